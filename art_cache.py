@@ -0,0 +1,377 @@
+"""
+art_cache.py
+
+Persistent on-disk cache for the ASCII art produced by imag_proc.image_to_ascii.
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from rich.text import Text, Span
+from imag_proc import image_to_ascii, ART_VERSION
+from art_styles import COLOR_MODES, DEFAULT_COLOR_MODE, parse_style
+from art_pyramid import PyramidCache, pyramid_to_ascii, PYRAMID_VERSION, PYRAMID_TOP
+from cache_paths import get_cache_dir
+from terminal import get_terminal_size
+
+DEFAULT_MAX_MB = 64
+MEMORY_ENTRIES = 256
+
+def fit_to_terminal(width: int, height: int, term_size: os.terminal_size | None = None) -> tuple[int, int]:
+    """
+    Clamp a requested art size to the terminal.
+
+    Args:
+        width (int): Requested width in cells.
+        height (int): Requested height in cells.
+        term_size (os.terminal_size, optional): Size to clamp to, default the current terminal.
+
+    Returns:
+        tuple[int, int]: The effective (width, height).
+    """
+    if term_size is None:
+        try:
+            term_size = get_terminal_size()
+        except OSError:
+            return width, height
+    return min(width, term_size.columns), min(height, term_size.lines)
+
+def render_art(image_path: str, width: int, height: int, colors: str = DEFAULT_COLOR_MODE,
+               pyramids: PyramidCache | None = None) -> Text:
+    """
+    Render art from the image file, or from its levels in a PyramidCache.
+    The two give slightly different art, see ArtCache.key.
+
+    Args:
+        image_path (str): Path to the image file.
+        width (int): Effective art width.
+        height (int): Effective art height.
+        colors (str): Colour mode, see art_styles.COLOR_MODES.
+        pyramids (PyramidCache, optional): Cache of decoded levels to render from.
+
+    Returns:
+        rich.text.Text: Rich Text object with colored ASCII art.
+    """
+    if pyramids is None:
+        return image_to_ascii(image_path, width, height, colors)
+    return pyramid_to_ascii(pyramids.get(image_path), width, height, colors)
+
+def render_payload(image_path: str, width: int, height: int, colors: str = DEFAULT_COLOR_MODE,
+                   pyramids: PyramidCache | None = None) -> tuple[str, list]:
+    """
+    Render an icon to the form stored on disk, which unlike rich.text.Text is
+    cheap to send between processes.
+
+    Args:
+        image_path (str): Path to the image file.
+        width (int): Effective art width.
+        height (int): Effective art height.
+        colors (str): Colour mode, see art_styles.COLOR_MODES.
+        pyramids (PyramidCache, optional): As for render_art.
+
+    Returns:
+        tuple[str, list]: The plain text and its (start, end, style) spans.
+    """
+    text = render_art(image_path, width, height, colors, pyramids)
+    return text.plain, [(s.start, s.end, str(s.style)) for s in text.spans]
+
+class ArtCache:
+    """
+    Two-level (memory + disk) cache of rendered ASCII art.
+
+    Entries are keyed by icon path, mtime, file size, target width/height,
+    colour mode, rendering pipeline (from the file or from pyramids) and
+    imag_proc.ART_VERSION, so touching the icon or changing the algorithm
+    invalidates them. The disk level is bounded by size; the
+    least recently used files are evicted first. Instances are safe to share
+    between threads.
+
+    With a PyramidCache, art is rendered from the decoded levels of the icon
+    it keeps, so a new size (after a resize) does not decode the icon again.
+
+    Raises:
+        ValueError: If the colour mode is not one of art_styles.COLOR_MODES.
+    """
+
+    def __init__(self, cache_dir: str | None = None, max_mb: float = DEFAULT_MAX_MB, pyramids: PyramidCache | None = None,
+                 colors: str = DEFAULT_COLOR_MODE):
+        if colors not in COLOR_MODES:
+            raise ValueError(f"Unknown colour mode {colors!r}, expected one of {', '.join(COLOR_MODES)}")
+        self.cache_dir = os.path.join(cache_dir or get_cache_dir(), "art")
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.pyramids = pyramids
+        self.colors = colors
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def key(self, image_path: str, width: int, height: int) -> str | None:
+        """
+        Build the cache key for an icon at a given size.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Effective art width.
+            height (int): Effective art height.
+
+        Returns:
+            str | None: Hex digest identifying the entry, or None if the image cannot be stat'ed.
+        """
+        try:
+            st = os.stat(image_path)
+        except (OSError, TypeError, ValueError):
+            return None
+        # Art resampled from pyramid levels differs from art decoded from the file
+        pipeline = "file" if self.pyramids is None else f"p{PYRAMID_VERSION}.{PYRAMID_TOP}"
+        raw = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{width}x{height}|{self.colors}|{pipeline}|v{ART_VERSION}"
+        return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".art")
+
+    def _remember(self, key: str, text: Text):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def in_memory(self, key: str) -> bool:
+        """
+        Args:
+            key (str): Cache key as returned by key().
+
+        Returns:
+            bool: True if the entry can be served without touching the disk.
+        """
+        return key in self._memory
+
+    def contains(self, key: str) -> bool:
+        """
+        Args:
+            key (str): Cache key as returned by key().
+
+        Returns:
+            bool: True if the entry is in memory or on disk.
+        """
+        return key in self._memory or os.path.exists(self._entry_path(key))
+
+    def get(self, image_path: str, width: int, height: int) -> Text | None:
+        """
+        Look up rendered art without rendering it.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Effective art width.
+            height (int): Effective art height.
+
+        Returns:
+            rich.text.Text | None: The cached art, or None on a miss.
+        """
+        key = self.key(image_path, width, height)
+        if key is None:
+            return None
+        return self.get_by_key(key)
+
+    def get_by_key(self, key: str) -> Text | None:
+        """
+        Look up rendered art by a key previously built with key().
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            rich.text.Text | None: The cached art, or None on a miss.
+        """
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                plain, spans = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+
+        text = Text(plain)
+        # Styles come back as text: share the interned Style objects instead of parsing them at every render
+        text.spans = [Span(start, end, parse_style(style)) for start, end, style in spans]
+        self._remember(key, text)
+        return text
+
+    def put(self, image_path: str, width: int, height: int, text: Text):
+        """
+        Store rendered art in memory and on disk.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Effective art width.
+            height (int): Effective art height.
+            text (rich.text.Text): The rendered art.
+        """
+        key = self.key(image_path, width, height)
+        if key is None:
+            return
+        self.put_by_key(key, text)
+
+    def put_by_key(self, key: str, text: Text):
+        """
+        Store rendered art under a key previously built with key().
+
+        Args:
+            key (str): Cache key.
+            text (rich.text.Text): The rendered art.
+        """
+        self._remember(key, text)
+        self.put_payload(key, (text.plain, [(s.start, s.end, str(s.style)) for s in text.spans]))
+
+    def put_payload(self, key: str, payload: tuple[str, list]):
+        """
+        Store art on disk only, as returned by render_payload.
+
+        Args:
+            key (str): Cache key.
+            payload (tuple[str, list]): Plain text and (start, end, style) spans.
+
+        Returns:
+            int: Bytes written, 0 if the entry could not be written.
+        """
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException as e:
+            # Also on Ctrl-C, so that no partial file is left behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if isinstance(e, OSError):
+                return 0
+            raise
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self.disk_usage()
+            else:
+                self._disk_bytes += len(data)
+            over_limit = self._disk_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return len(data)
+
+    def render(self, image_path: str, width: int, height: int) -> Text:
+        """
+        Render art without looking it up or storing it.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Effective art width.
+            height (int): Effective art height.
+
+        Returns:
+            rich.text.Text: Rich Text object with colored ASCII art.
+        """
+        return render_art(image_path, width, height, self.colors, self.pyramids)
+
+    def get_or_render(self, image_path: str, width: int, height: int) -> Text:
+        """
+        Return cached art for an icon, rendering and storing it on a miss.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Requested art width.
+            height (int): Requested art height.
+
+        Returns:
+            rich.text.Text: Rich Text object with colored ASCII art.
+        """
+        width, height = fit_to_terminal(width, height)
+        key = self.key(image_path, width, height)
+        if key is not None:
+            text = self.get_by_key(key)
+            if text is not None:
+                return text
+
+        text = self.render(image_path, width, height)
+        if key is not None:
+            self.put_by_key(key, text)
+        return text
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.cache_dir) if e.name.endswith(".art")]
+        except OSError:
+            return []
+
+    def disk_usage(self) -> int:
+        """
+        Returns:
+            int: Total size in bytes of the entries on disk.
+        """
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the disk usage is below 80% of the limit.
+        """
+        entries = []
+        for entry in self._entries():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.8)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self) -> int:
+        """
+        Remove every cached entry, in memory and on disk.
+
+        Returns:
+            int: Number of files removed.
+        """
+        with self._lock:
+            self._memory.clear()
+        removed = 0
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = 0
+        return removed
@@ -0,0 +1,289 @@
+"""
+art_pyramid.py
+
+Decoded icons kept at a few resolutions, so that the art for a new panel size
+is resampled from memory instead of decoding the source file again.
+"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from imag_proc import decode_reduced, resample_colors, fit_art_size, colors_to_ascii, REDUCE_MARGIN
+from cache_paths import get_cache_dir
+from art_styles import DEFAULT_COLOR_MODE
+from profiling import profiled
+
+# Bump whenever the levels built from an image change
+PYRAMID_VERSION = 1
+# Longest side of the largest level: art up to PYRAMID_TOP / REDUCE_MARGIN cells wide keeps full detail
+PYRAMID_TOP = 512
+# Levels stop once their longest side is below this
+PYRAMID_BOTTOM = 32
+DEFAULT_MAX_MB = 64
+MEMORY_PYRAMIDS = 32
+
+def pyramid_layout(width: int, height: int) -> list[tuple[int, int, int, int]]:
+    """
+    Place the levels of a pyramid in one array, as in a mipmap atlas: the
+    largest level on the left, each smaller one (half the size, rounded down)
+    below the previous in a column on its right. The atlas is as tall as the
+    largest level and half as wide again, so its shape alone gives the layout.
+
+    Args:
+        width (int): Width of the largest level.
+        height (int): Height of the largest level.
+
+    Returns:
+        list[tuple[int, int, int, int]]: (x, y, width, height) of every level, largest first.
+    """
+    levels = [(0, 0, width, height)]
+    y = 0
+    while max(width, height) >= PYRAMID_BOTTOM * 2 and min(width, height) >= 2:
+        width, height = width // 2, height // 2
+        levels.append((levels[0][2], y, width, height))
+        y += height
+    return levels
+
+def build_pyramid(image_path: str) -> np.ndarray:
+    """
+    Decode an image and pack it at every level into one array.
+
+    The largest level is the image decoded at reduced resolution (see
+    imag_proc.decode_reduced) to a longest side between PYRAMID_TOP / 2 and
+    PYRAMID_TOP, or at full size for smaller images. Each further level halves
+    the previous one.
+
+    Args:
+        image_path (str): Path to the image file.
+
+    Returns:
+        np.ndarray: RGB (uint8) atlas of the levels over a black background, see pyramid_layout.
+    """
+    from PIL import Image
+    img = Image.open(image_path)
+    scale = min(1, PYRAMID_TOP / 2 / max(img.width, img.height))
+    img = decode_reduced(img, (max(1, int(img.width * scale)), max(1, int(img.height * scale))))
+
+    atlas = np.zeros((img.height, img.width + img.width // 2, 3), dtype=np.uint8)
+    for x, y, width, height in pyramid_layout(img.width, img.height):
+        if (width, height) != img.size:
+            img = img.resize((width, height), Image.Resampling.BOX)
+        atlas[y:y + height, x:x + width] = np.asarray(img)[:, :, :3]
+    return atlas
+
+def pyramid_levels(atlas: np.ndarray) -> list[np.ndarray]:
+    """
+    Args:
+        atlas (np.ndarray): As returned by build_pyramid.
+
+    Returns:
+        list[np.ndarray]: Views of the levels in the atlas, largest first.
+    """
+    width = atlas.shape[1] - atlas.shape[1] // 3
+    return [atlas[y:y + h, x:x + w] for x, y, w, h in pyramid_layout(width, atlas.shape[0])]
+
+@profiled("pyramid_to_ascii")
+def pyramid_to_ascii(levels: list[np.ndarray], in_width: int = 40, in_height: int = 40, colors: str = DEFAULT_COLOR_MODE):
+    """
+    Convert an image to ASCII art like imag_proc.image_to_ascii, resampling the
+    smallest level that still has REDUCE_MARGIN pixels per cell.
+
+    Args:
+        levels (list[np.ndarray]): Levels of the image, as returned by pyramid_levels.
+        in_width (int): Target width for ASCII art.
+        in_height (int): Target height for ASCII art.
+        colors (str): Colour mode, see art_styles.COLOR_MODES.
+
+    Returns:
+        rich.text.Text: Rich Text object with colored ASCII art.
+    """
+    width, height = fit_art_size(levels[0].shape[1], levels[0].shape[0], in_width, in_height)
+    source = levels[0]
+    for level in levels[1:]:
+        if level.shape[1] < width * REDUCE_MARGIN or level.shape[0] < height * REDUCE_MARGIN:
+            break
+        source = level
+    return colors_to_ascii(resample_colors(source, width, height), colors)
+
+class PyramidCache:
+    """
+    Two-level (memory + disk) cache of image pyramids.
+
+    Entries are keyed by image path, mtime, file size and PYRAMID_VERSION.
+    On disk each pyramid is one .npy atlas, memory-mapped when read back, so
+    a pyramid costs no heap until its pages are touched. The disk level is
+    bounded by size, the least recently used files are evicted first; with a
+    size of 0 only the memory level is used. Instances are safe to share
+    between threads, and are pickled without their memory level, so a
+    process pool gets its own copies of the cache.
+    """
+
+    def __init__(self, cache_dir: str | None = None, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = os.path.join(cache_dir or get_cache_dir(), "pyramid")
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict):
+        self.cache_dir = state["cache_dir"]
+        self.max_bytes = state["max_bytes"]
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def key(self, image_path: str) -> str | None:
+        """
+        Args:
+            image_path (str): Path to the image file.
+
+        Returns:
+            str | None: Hex digest identifying the entry, or None if the image cannot be stat'ed.
+        """
+        try:
+            st = os.stat(image_path)
+        except (OSError, TypeError, ValueError):
+            return None
+        raw = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|p{PYRAMID_VERSION}|{PYRAMID_TOP}"
+        return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def get(self, image_path: str) -> list[np.ndarray]:
+        """
+        Return the levels of an image, building and storing them on a miss.
+
+        Args:
+            image_path (str): Path to the image file.
+
+        Returns:
+            list[np.ndarray]: The levels, largest first (see pyramid_levels).
+
+        Raises:
+            FileNotFoundError: If the image does not exist.
+        """
+        key = self.key(image_path)
+        if key is None:
+            raise FileNotFoundError(f"Image not found: {image_path}")
+        with self._lock:
+            levels = self._memory.get(key)
+            if levels is not None:
+                self._memory.move_to_end(key)
+                return levels
+
+        atlas = None
+        if self.max_bytes > 0:
+            try:
+                atlas = np.load(self._entry_path(key), mmap_mode="r")
+                os.utime(self._entry_path(key))  # mark as recently used for eviction
+            except (OSError, ValueError):
+                atlas = None
+        if atlas is None:
+            atlas = build_pyramid(image_path)
+            if self.max_bytes > 0:
+                self._store(key, atlas)
+
+        levels = pyramid_levels(atlas)
+        with self._lock:
+            self._memory[key] = levels
+            while len(self._memory) > MEMORY_PYRAMIDS:
+                self._memory.popitem(last=False)
+        return levels
+
+    def _store(self, key: str, atlas: np.ndarray):
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.save(f, atlas)
+            os.replace(tmp_path, path)
+        except BaseException as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if isinstance(e, OSError):
+                return
+            raise
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self.disk_usage()
+            else:
+                self._disk_bytes += atlas.nbytes
+            over_limit = self._disk_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.cache_dir) if e.name.endswith(".npy")]
+        except OSError:
+            return []
+
+    def disk_usage(self) -> int:
+        """
+        Returns:
+            int: Total size in bytes of the entries on disk.
+        """
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the disk usage is below 80% of the limit.
+        """
+        entries = []
+        for entry in self._entries():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.8)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Still mapped, on Windows
+                continue
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self) -> int:
+        """
+        Remove every cached entry, in memory and on disk.
+
+        Returns:
+            int: Number of files removed.
+        """
+        with self._lock:
+            self._memory.clear()
+        removed = 0
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = 0
+        return removed
@@ -0,0 +1,113 @@
+"""
+art_styles.py
+
+Colours of the rendered art, quantized to the configured depth and turned
+into Rich styles once, so that every cell, icon and frame using a colour
+shares one Style object.
+"""
+
+import functools
+import numpy as np
+from rich.color import Color
+from rich.style import Style
+
+# Colour depths of the art, from the most faithful to the cheapest to draw:
+#   "truecolor"  24-bit colours, as sampled from the icon
+#   "4096"       4 bits per channel
+#   "256"        the 240 colours of the xterm palette (6x6x6 cube and grey ramp)
+COLOR_MODES = ("truecolor", "4096", "256")
+DEFAULT_COLOR_MODE = "truecolor"
+
+# Styles kept alive; the 4096 and 256 modes never need more
+MAX_STYLES = 4096
+
+# Codes of palette colours ("256" mode) are the palette index with this bit
+# set, all others are 0xRRGGBB
+PALETTE_CODE = 1 << 24
+
+# Channel levels of the xterm 6x6x6 colour cube (palette 16-231)
+CUBE_LEVELS = np.array([0, 95, 135, 175, 215, 255])
+# Levels of the grey ramp (palette 232-255)
+GREY_LEVELS = np.arange(8, 248, 10)
+
+def quantize_colors(arr_colors: np.ndarray, mode: str = DEFAULT_COLOR_MODE) -> np.ndarray:
+    """
+    Map colours to the nearest colour of a colour mode.
+
+    Args:
+        arr_colors (np.ndarray): RGB colours (uint8), shape (..., 3).
+        mode (str): One of COLOR_MODES.
+
+    Returns:
+        np.ndarray: One colour code (int32) per colour, see color_style.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    rgb = arr_colors.astype(np.int32)
+    if mode == "truecolor":
+        return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    if mode == "4096":
+        # Levels 0, 17, ..., 255: at most 8 away from the original value
+        rgb = (rgb * 15 + 127) // 255 * 17
+        return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    if mode == "256":
+        # Nearest cube colour, channel by channel
+        cube = np.searchsorted((CUBE_LEVELS[1:] + CUBE_LEVELS[:-1]) / 2, rgb)
+        cube_error = ((CUBE_LEVELS[cube] - rgb) ** 2).sum(axis=-1)
+        # Nearest grey of the ramp
+        grey = np.clip((rgb.sum(axis=-1) / 3 - 8 + 5) // 10, 0, len(GREY_LEVELS) - 1).astype(np.int32)
+        grey_error = ((GREY_LEVELS[grey][..., None] - rgb) ** 2).sum(axis=-1)
+        index = np.where(grey_error < cube_error, 232 + grey, 16 + cube[..., 0] * 36 + cube[..., 1] * 6 + cube[..., 2])
+        return index | PALETTE_CODE
+    raise ValueError(f"Unknown colour mode {mode!r}, expected one of {', '.join(COLOR_MODES)}")
+
+def code_to_rgb(codes: np.ndarray) -> np.ndarray:
+    """
+    Colours shown for colour codes, taking the standard xterm values for the palette.
+
+    Args:
+        codes (np.ndarray): Colour codes, as returned by quantize_colors.
+
+    Returns:
+        np.ndarray: RGB colours (uint8), shape codes.shape + (3,).
+    """
+    codes = np.asarray(codes, dtype=np.int32)
+    index = codes & 0xFF
+    cube = index - 16
+    palette = np.where(
+        index[..., None] >= 232,
+        (GREY_LEVELS[np.clip(index - 232, 0, len(GREY_LEVELS) - 1)])[..., None],
+        CUBE_LEVELS[np.stack([cube // 36 % 6, cube // 6 % 6, cube % 6], axis=-1)],
+    )
+    rgb = np.stack([(codes >> 16) & 0xFF, (codes >> 8) & 0xFF, codes & 0xFF], axis=-1)
+    return np.where((codes & PALETTE_CODE != 0)[..., None], palette, rgb).astype(np.uint8)
+
+@functools.lru_cache(maxsize=MAX_STYLES)
+def color_style(code: int) -> Style:
+    """
+    The style of a colour code, interned: equal codes give the same Style
+    object, whose ANSI codes Rich then computes only once.
+
+    Args:
+        code (int): Colour code, as returned by quantize_colors.
+
+    Returns:
+        rich.style.Style: Style with that foreground colour.
+    """
+    if code & PALETTE_CODE:
+        return Style(color=Color.from_ansi(code & 0xFF))
+    return Style(color=Color.from_rgb(code >> 16, (code >> 8) & 0xFF, code & 0xFF))
+
+@functools.lru_cache(maxsize=MAX_STYLES)
+def parse_style(definition: str) -> Style:
+    """
+    Interned Style.parse, for styles read back as text from the art cache.
+
+    Args:
+        definition (str): Style definition, e.g. '#ff8000' or 'color(208)'.
+
+    Returns:
+        rich.style.Style: The parsed style.
+    """
+    return Style.parse(definition)
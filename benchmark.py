@@ -0,0 +1,431 @@
+"""
+benchmark.py
+
+Times the stages of the library pipeline separately on synthetic Steam
+installations (see synthetic_steam.py) of several sizes, and writes the
+results as JSON so that runs on different commits can be compared.
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import random
+import subprocess
+import statistics
+import numpy as np
+from PIL import Image
+from datetime import datetime, timezone
+from synthetic_steam import generate_steam, hero_bytes, SYNTHETIC_VERSION
+from parser import get_shortcuts, get_installed_games, get_localconfig_last_playtime, get_shortcut_last_playtime
+from icon_search import find_and_classify_steam_images
+from steam_tui import get_games, manifest_game, shortcut_game
+from imag_proc import image_to_ascii, sobel_edge
+from art_styles import COLOR_MODES, quantize_colors, code_to_rgb
+from game_table import GameTable
+from library_view import LibraryView
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_REPEAT = 5
+# Icons converted by each run of the image_to_ascii benchmark, and their size in cells
+ASCII_SAMPLE = 20
+ASCII_SIZE = (40, 20)
+# Sizes of the large images of the image_to_ascii_hero benchmarks (Steam library
+# heroes, at 1x and 2x), and images converted per run
+HERO_SIZES = [(1920, 620), (3840, 1240)]
+HERO_SAMPLE = 5
+# Installation (games, shortcuts) with many non-Steam shortcuts, on which the
+# shortcut benchmarks also run, reported as e.g. get_shortcuts_5000
+SHORTCUT_CASE = (1000, 5000)
+SHORTCUT_BENCHMARKS = ["get_shortcuts", "get_shortcut_last_playtime"]
+# Sizes (width x height) of the grey images of the sobel_edge benchmarks, from
+# icon to hero art at 40x20 cells, and images filtered per run
+SOBEL_SIZES = [(40, 40), (120, 60), (200, 100)]
+SOBEL_SAMPLE = 5
+# Shapes (rows, columns) on which --check compares sobel_edge with sobel_edge_loop,
+# including images with no inner pixel
+SOBEL_CHECK_SHAPES = [(1, 1), (2, 5), (5, 2), (3, 3), (22, 42), (40, 40), (60, 120), (100, 200)]
+# Largest difference, on any channel, between a colour and the colour shown for
+# it in each colour mode, over all 24-bit colours. In "256" mode the nearest
+# colour by squared distance can be a grey 57 away on one channel.
+QUANTIZE_MAX_ERROR = {"truecolor": 0, "4096": 8, "256": 57}
+# Queries typed, then deleted, one key at a time by the search_keystroke benchmarks
+KEYSTROKE_QUERIES = ["e", "dark souls", "hollow knight", "stardew"]
+FUZZY_KEYSTROKE_QUERIES = ["dsouls", "hk", "stardew"]
+
+def keystrokes(queries: list[str]) -> list[str]:
+    """
+    Contents of the search box while typing every query and deleting it again.
+
+    Args:
+        queries (list[str]): Search strings.
+
+    Returns:
+        list[str]: The search box after each key.
+    """
+    typed = []
+    for query in queries:
+        typed += [query[:i] for i in range(1, len(query) + 1)]
+        typed += [query[:i] for i in range(len(query) - 1, -1, -1)]
+    return typed
+
+def grey_image(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    """
+    Grey image with smooth areas, sharp edges and noise around mid-grey, like the
+    difference of Gaussians that sobel_edge receives.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+
+    Returns:
+        PIL.Image.Image: Image of mode "L".
+    """
+    y, x = np.mgrid[0:height, 0:width]
+    levels = 128 + 40 * np.sin(x / rng.uniform(2, 8)) * np.cos(y / rng.uniform(2, 8))
+    levels += np.where(x + y > (width + height) / 2, 50, -50) + rng.normal(0, 8, (height, width))
+    return Image.fromarray(np.clip(levels, 0, 255).astype(np.uint8))
+
+def sobel_edge_loop(image, edge_threshold=0.3):
+    """
+    Reference sobel_edge: the per-pixel loop it replaced, kept for --check.
+
+    Args:
+        image (np.ndarray or PIL.Image): Grayscale image.
+        edge_threshold (float): Threshold for edge detection.
+
+    Returns:
+        np.ndarray: Array of edge angles, masked by threshold.
+    """
+    Gx = np.array([[1.0, 0.0, -1.0], [2.0, 0.0, -2.0], [1.0, 0.0, -1.0]])
+    Gy = np.array([[1.0, 2.0, 1.0], [0.0, 0.0, 0.0], [-1.0, -2.0, -1.0]])
+    [rows, columns] = np.shape(image)
+
+    arr_img = np.array(image)
+
+    mags = np.zeros(shape=(rows, columns))
+    angles = np.zeros(shape=(rows, columns))
+
+    for i in range(rows - 2):
+        for j in range(columns - 2):
+            gx = np.sum(np.multiply(Gx, arr_img[i:i + 3, j:j + 3]))
+            gy = np.sum(np.multiply(Gy, arr_img[i:i + 3, j:j + 3]))
+            mags[i + 1, j + 1] = np.sqrt(gx ** 2 + gy ** 2)
+            angles[i + 1, j + 1] = np.arctan2(gy, gx)
+
+    mask = (mags/(mags.max()+ 1e-8)) > edge_threshold
+    return np.where(mask, angles, 0)
+
+def check_sobel_edge(seed: int):
+    """
+    Check that sobel_edge returns exactly what sobel_edge_loop returns. On 8-bit
+    images both sum small integers, which float64 represents exactly.
+
+    Args:
+        seed (int): Seed of the test images.
+
+    Raises:
+        AssertionError: If the results differ on a shape.
+    """
+    rng = np.random.default_rng(seed)
+    for rows, columns in SOBEL_CHECK_SHAPES:
+        for image in (grey_image(rng, columns, rows), Image.new("L", (columns, rows), 128)):
+            for threshold in (0.0, 0.3, 0.9):
+                expected = sobel_edge_loop(image, threshold)
+                actual = sobel_edge(image, threshold)
+                assert actual.shape == expected.shape and np.array_equal(actual, expected), \
+                    f"sobel_edge differs from the loop on {rows}x{columns} at threshold {threshold}"
+
+def check_quantization(seed: int):
+    """
+    Check, on every 24-bit colour, that the colour shown for a colour code stays
+    within QUANTIZE_MAX_ERROR of the original on each channel, and that truecolor
+    codes give back the original colour exactly.
+
+    Args:
+        seed (int): Unused, all colours are checked.
+
+    Raises:
+        AssertionError: If a colour is shown further off than the bound of its mode.
+    """
+    levels = np.arange(256)
+    for red in range(0, 256, 16):
+        # 16 reds at a time, with every green and blue
+        rgb = np.stack(np.meshgrid(np.arange(red, red + 16), levels, levels, indexing="ij"), axis=-1).astype(np.uint8)
+        assert np.array_equal(code_to_rgb(quantize_colors(rgb, "truecolor")), rgb), \
+            f"truecolor codes do not round-trip for reds {red}-{red + 15}"
+        for mode in COLOR_MODES:
+            error = np.abs(code_to_rgb(quantize_colors(rgb, mode)).astype(np.int32) - rgb).max()
+            assert error <= QUANTIZE_MAX_ERROR[mode], \
+                f"{mode} colours are up to {error} off for reds {red}-{red + 15}, expected at most {QUANTIZE_MAX_ERROR[mode]}"
+
+# Checks run by --check, by name
+CHECKS = {"sobel_edge": check_sobel_edge, "quantize_colors": check_quantization}
+
+def measure(fn, repeat: int, setup=None) -> list[float]:
+    """
+    Time fn over repeat runs, after one untimed run that warms up the disk cache.
+
+    Args:
+        fn (callable): Function to time, called with the result of setup if given.
+        repeat (int): Number of timed runs.
+        setup (callable, optional): Called before each run, untimed.
+
+    Returns:
+        list[float]: Duration of each run, in seconds.
+    """
+    times = []
+    for run in range(repeat + 1):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        if run > 0:
+            times.append(elapsed)
+    return times
+
+def prepare_tree(work_dir: str, games: int, seed: int, shortcuts: int | None = None) -> dict:
+    """
+    Generate the synthetic installation for a size, reusing the one already in
+    work_dir if it was generated with the same parameters.
+
+    Args:
+        work_dir (str): Directory holding the installations.
+        games (int): Number of games.
+        seed (int): Random seed.
+        shortcuts (int, optional): Number of non-Steam shortcuts, defaults to 5% of games.
+
+    Returns:
+        dict: The tree, as returned by synthetic_steam.generate_steam.
+    """
+    root = os.path.join(work_dir, f"steam_{games}" if shortcuts is None else f"steam_{games}_{shortcuts}")
+    marker = os.path.join(root, "synthetic.json")
+    params = {"version": SYNTHETIC_VERSION, "games": games, "shortcuts": shortcuts, "seed": seed}
+    try:
+        with open(marker, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["params"] == params:
+            return saved["tree"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    shutil.rmtree(root, ignore_errors=True)
+    tree = generate_steam(root, games, libraries=3, shortcuts=shortcuts, seed=seed)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "tree": tree}, f)
+    return tree
+
+def run_suite(tree: dict, repeat: int, only: list[str] | None = None) -> list[dict]:
+    """
+    Run every benchmark on one installation.
+
+    Args:
+        tree (dict): The installation, as returned by prepare_tree.
+        repeat (int): Timed runs per benchmark.
+        only (list[str], optional): Names of the benchmarks to run, default all.
+
+    Returns:
+        list[dict]: One entry per benchmark: 'name', 'calls' (calls per run) and 'runs' (seconds).
+    """
+    steam_id, steam_path = tree["steam_id"], tree["steam_path"]
+    # Inputs of the functions that update games, built once
+    steam_games = [manifest_game(game) for lib in tree["libraries"] for game in get_installed_games(lib)]
+    shortcut_games = [shortcut_game(shortcut) for shortcut in get_shortcuts(tree["shortcuts"])]
+    icons = []
+    for appid in tree["appids"]:
+        try:
+            icon = find_and_classify_steam_images(steam_path, appid)["icon"]
+        except OSError:
+            continue
+        if icon:
+            icons.append(icon)
+        if len(icons) == ASCII_SAMPLE:
+            break
+    cache_root = tempfile.mkdtemp(prefix="steam_tui_bench_")
+    heroes = {}
+    rng = random.Random(0)
+    for width, height in HERO_SIZES:
+        if only and f"image_to_ascii_hero_{width}x{height}" not in only:
+            continue
+        heroes[(width, height)] = []
+        for i in range(HERO_SAMPLE):
+            path = os.path.join(cache_root, f"hero_{width}x{height}_{i}.jpg")
+            with open(path, "wb") as f:
+                f.write(hero_bytes(rng, width, height))
+            heroes[(width, height)].append(path)
+
+    sobel_images = {}
+    sobel_rng = np.random.default_rng(0)
+    for width, height in SOBEL_SIZES:
+        if only and f"sobel_edge_{width}x{height}" not in only:
+            continue
+        sobel_images[(width, height)] = [grey_image(sobel_rng, width, height) for _ in range(SOBEL_SAMPLE)]
+
+    def find_images():
+        for appid in tree["appids"]:
+            try:
+                find_and_classify_steam_images(steam_path, appid)
+            except OSError:
+                pass
+
+    table = GameTable(get_games(steam_id, steam_path, os.path.join(cache_root, "table")))
+    typed = keystrokes(KEYSTROKE_QUERIES)
+    typed_fuzzy = keystrokes(FUZZY_KEYSTROKE_QUERIES)
+
+    def type_keys(view, typed, fuzzy):
+        for query in typed:
+            view.select(query, "name", False, fuzzy)
+
+    def new_view():
+        # Built untimed, as when the games are loaded, with the sort order ready
+        view = LibraryView(table)
+        view.order("name", False)
+        return view
+
+    cold_runs = iter(range(repeat + 1))
+    benchmarks = [
+        ("get_shortcuts", 1, lambda: get_shortcuts(tree["shortcuts"]), None),
+        ("get_installed_games", len(tree["libraries"]), lambda: [get_installed_games(lib) for lib in tree["libraries"]], None),
+        ("get_localconfig_last_playtime", 1, lambda: get_localconfig_last_playtime(steam_games, tree["localconfig"]), None),
+        ("get_shortcut_last_playtime", 1, lambda: get_shortcut_last_playtime(shortcut_games, tree["gameprocess"]), None),
+        ("find_and_classify_steam_images", len(tree["appids"]), find_images, None),
+        # Cold: a new, empty snapshot directory per run
+        ("get_games_cold", 1, lambda cache_dir: get_games(steam_id, steam_path, cache_dir),
+         lambda: os.path.join(cache_root, f"cold{next(cold_runs)}")),
+        ("get_games_warm", 1, lambda: get_games(steam_id, steam_path, os.path.join(cache_root, "warm")), None),
+        ("image_to_ascii", len(icons), lambda: [image_to_ascii(icon, *ASCII_SIZE) for icon in icons], None),
+        # Through LibraryView, as the UI filters; the first fuzzy key also builds the fuzzy tables
+        ("search_keystroke", len(typed), lambda view: type_keys(view, typed, False), new_view),
+        ("search_keystroke_fuzzy", len(typed_fuzzy), lambda view: type_keys(view, typed_fuzzy, True), new_view),
+    ]
+    benchmarks += [
+        (f"image_to_ascii_hero_{width}x{height}", len(paths), lambda paths=paths: [image_to_ascii(path, *ASCII_SIZE) for path in paths], None)
+        for (width, height), paths in heroes.items()
+    ]
+    benchmarks += [
+        (f"sobel_edge_{width}x{height}", len(images), lambda images=images: [sobel_edge(image) for image in images], None)
+        for (width, height), images in sobel_images.items()
+    ]
+    results = []
+    try:
+        for name, calls, fn, setup in benchmarks:
+            if only and name not in only:
+                continue
+            results.append({"name": name, "calls": calls, "runs": measure(fn, repeat, setup)})
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+    return results
+
+def summarize(runs: list[float]) -> dict:
+    """
+    Args:
+        runs (list[float]): Durations in seconds.
+
+    Returns:
+        dict: 'min', 'median', 'mean' and 'max' in seconds.
+    """
+    return {"min": min(runs), "median": statistics.median(runs), "mean": statistics.fmean(runs), "max": max(runs)}
+
+def get_revision() -> str | None:
+    """
+    Returns:
+        str | None: The git revision of the code being measured, with '-dirty' for local changes.
+    """
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: dict, current: dict):
+    """
+    Print the median of each benchmark in both reports and their ratio.
+
+    Args:
+        baseline (dict): Earlier report.
+        current (dict): New report.
+    """
+    old = {(r["name"], r["games"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('revision')}:")
+    print(f"{'benchmark':32} {'games':>6} {'before ms':>11} {'after ms':>11} {'ratio':>7}")
+    for result in current["results"]:
+        before = old.get((result["name"], result["games"]))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else float("inf")
+        print(f"{result['name']:32} {result['games']:>6} {before['median'] * 1000:>11.2f} {result['median'] * 1000:>11.2f} {ratio:>6.2f}x")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the library pipeline on synthetic Steam installations")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of games (default 100 1000 10000)")
+    arg_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark (default 5)")
+    arg_parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    arg_parser.add_argument("--shortcuts", type=int, help="non-Steam shortcuts of every installation (default 5%% of the games, "
+                            f"plus {SHORTCUT_CASE[1]} shortcuts on {SHORTCUT_CASE[0]} games for the shortcut benchmarks)")
+    arg_parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic installations")
+    arg_parser.add_argument("--work-dir", help="keep the synthetic installations here and reuse them (default: a temporary directory)")
+    arg_parser.add_argument("--output", help="write the results to this JSON file")
+    arg_parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    arg_parser.add_argument("--check", action="store_true", help="check the optimized functions against their reference versions instead")
+    args = arg_parser.parse_args()
+
+    if args.check:
+        for name, check in CHECKS.items():
+            check(args.seed)
+            print(f"{name}: ok")
+        sys.exit(0)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="steam_tui_synthetic_")
+    os.makedirs(work_dir, exist_ok=True)
+    report = {
+        "meta": {
+            "revision": get_revision(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "shortcuts": args.shortcuts,
+            "synthetic_version": SYNTHETIC_VERSION,
+        },
+        "results": [],
+    }
+    try:
+        print(f"{'benchmark':32} {'games':>6} {'calls':>6} {'min ms':>10} {'median ms':>10} {'max ms':>10}")
+        def add_result(name, size, result):
+            result = {"name": name, "games": size, "calls": result["calls"], **summarize(result["runs"]), "runs": result["runs"]}
+            report["results"].append(result)
+            print(f"{result['name']:32} {size:>6} {result['calls']:>6} {result['min'] * 1000:>10.2f} "
+                  f"{result['median'] * 1000:>10.2f} {result['max'] * 1000:>10.2f}")
+            sys.stdout.flush()
+
+        for size in args.sizes:
+            tree = prepare_tree(work_dir, size, args.seed, args.shortcuts)
+            for result in run_suite(tree, args.repeat, args.only):
+                add_result(result["name"], size, result)
+        if args.shortcuts is None:
+            size, shortcuts = SHORTCUT_CASE
+            names = {f"{name}_{shortcuts}": name for name in SHORTCUT_BENCHMARKS if not args.only or f"{name}_{shortcuts}" in args.only}
+            if names:
+                tree = prepare_tree(work_dir, size, args.seed, shortcuts)
+                for result in run_suite(tree, args.repeat, list(names.values())):
+                    add_result(f"{result['name']}_{shortcuts}", size, result)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
@@ -0,0 +1,24 @@
+"""
+cache_paths.py
+
+Location of the files steam_tui caches between runs.
+"""
+
+import os
+
+def get_cache_dir() -> str:
+    """
+    Return the directory used for steam_tui caches.
+
+    Honours STEAM_TUI_CACHE, then LOCALAPPDATA on Windows and XDG_CACHE_HOME elsewhere,
+    falling back to ~/.cache/steam_tui.
+
+    Returns:
+        str: Path of the cache directory (not created).
+    """
+    if os.environ.get("STEAM_TUI_CACHE"):
+        return os.environ["STEAM_TUI_CACHE"]
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return os.path.join(os.environ["LOCALAPPDATA"], "steam_tui", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "steam_tui")
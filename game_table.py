@@ -0,0 +1,181 @@
+"""
+game_table.py
+
+Columnar storage of the game list, for the UI to keep for the whole session.
+"""
+
+import numpy as np
+from collections.abc import Mapping, Sequence
+from steam_tui import shortcut_id, shortcut_exe, steam_exe
+
+class GameTable:
+    """
+    The games returned by get_games, stored by column instead of one dict per game.
+
+    Play times and sizes are int64 arrays, categories are codes into a short
+    list of distinct names, and the launch command and shortcut id are derived
+    from the appid when read rather than stored. Names, appids and icons stay
+    Python lists. Indexing returns a GameRow, a read-only view that behaves
+    like the original dict, so code written for dicts keeps working.
+    """
+
+    def __init__(self, games: list[dict]):
+        n = len(games)
+        self.shortcut = np.fromiter(("id" in game for game in games), dtype=bool, count=n)
+        # As found: str for Steam games, int for shortcuts
+        self.appid = [game["appid"] for game in games]
+        self.name = [game["name"] for game in games]
+        self.icon = [game["icon"] for game in games]
+        self.last_played = np.fromiter((game["last_played"] for game in games), dtype=np.int64, count=n)
+        self.play_time = np.fromiter((game["play_time"] for game in games), dtype=np.int64, count=n)
+        self.size_on_disk = np.fromiter((int(game.get("size_on_disk") or 0) for game in games), dtype=np.int64, count=n)
+
+        codes = {}
+        self.category = np.fromiter((codes.setdefault(game["category"], len(codes)) for game in games), dtype=np.int32, count=n)
+        self.categories = list(codes)
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GameTable):
+            return NotImplemented
+        # Tables built from equal game lists get the same category codes
+        return (self.name == other.name and self.appid == other.appid and self.icon == other.icon
+                and self.categories == other.categories and np.array_equal(self.category, other.category)
+                and np.array_equal(self.shortcut, other.shortcut) and np.array_equal(self.last_played, other.last_played)
+                and np.array_equal(self.play_time, other.play_time) and np.array_equal(self.size_on_disk, other.size_on_disk))
+
+    __hash__ = None
+
+    def __getitem__(self, i: int) -> "GameRow":
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return GameRow(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield GameRow(self, i)
+
+    def sort_keys(self, field: str) -> np.ndarray:
+        """
+        Args:
+            field (str): 'name', 'category', 'last_played' or 'play_time'.
+
+        Returns:
+            np.ndarray: One key per game, ordered like the field values.
+        """
+        if field == "name":
+            return np.array(self.name, dtype=str)
+        if field == "category":
+            ranks = np.empty(len(self.categories), dtype=np.int32)
+            ranks[np.argsort(np.array(self.categories, dtype=str), kind="stable")] = np.arange(len(self.categories))
+            return ranks[self.category]
+        if field in ("last_played", "play_time"):
+            return getattr(self, field)
+        raise KeyError(field)
+
+    def order(self, field: str, descending: bool = False) -> np.ndarray:
+        """
+        Sort the games by a field, keeping equal games in table order like a stable sort.
+
+        Args:
+            field (str): Field to sort by, see sort_keys.
+            descending (bool): Sort from the largest value.
+
+        Returns:
+            np.ndarray: Positions of the games in sorted order.
+        """
+        keys = self.sort_keys(field)
+        if not descending:
+            return np.argsort(keys, kind="stable")
+        # Sort the reversed keys and reverse the result: equal keys keep table order
+        n = len(keys)
+        return (n - 1) - np.argsort(keys[::-1], kind="stable")[::-1]
+
+    def rows(self, positions) -> "GameRows":
+        """
+        Args:
+            positions (Sequence[int]): Positions of games in the table.
+
+        Returns:
+            GameRows: The games at those positions, without copying them.
+        """
+        return GameRows(self, positions)
+
+def _size_on_disk(table, i):
+    if table.shortcut[i]:
+        raise KeyError("size_on_disk")
+    return str(table.size_on_disk[i])
+
+def _id(table, i):
+    if not table.shortcut[i]:
+        raise KeyError("id")
+    return shortcut_id(table.appid[i])
+
+# Readers of each field, in the key order of the game dicts
+FIELDS = {
+    "appid": lambda table, i: table.appid[i],
+    "name": lambda table, i: table.name[i],
+    "exe": lambda table, i: shortcut_exe(shortcut_id(table.appid[i])) if table.shortcut[i] else steam_exe(table.appid[i]),
+    "icon": lambda table, i: table.icon[i],
+    "category": lambda table, i: table.categories[table.category[i]],
+    "last_played": lambda table, i: int(table.last_played[i]),
+    "play_time": lambda table, i: int(table.play_time[i]),
+    "size_on_disk": _size_on_disk,
+    "id": _id,
+}
+STEAM_KEYS = ("appid", "name", "exe", "icon", "category", "last_played", "play_time", "size_on_disk")
+SHORTCUT_KEYS = ("appid", "name", "exe", "icon", "category", "last_played", "play_time", "id")
+
+class GameRow(Mapping):
+    """
+    Read-only view of one game of a GameTable, with the keys and values of its dict.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: GameTable, index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key: str):
+        reader = FIELDS.get(key)
+        if reader is None:
+            raise KeyError(key)
+        return reader(self.table, self.index)
+
+    def __iter__(self):
+        return iter(SHORTCUT_KEYS if self.table.shortcut[self.index] else STEAM_KEYS)
+
+    def __len__(self) -> int:
+        return len(SHORTCUT_KEYS if self.table.shortcut[self.index] else STEAM_KEYS)
+
+    def __repr__(self) -> str:
+        return f"GameRow({dict(self)!r})"
+
+class GameRows(Sequence):
+    """
+    Games of a GameTable at the given positions, e.g. a sorted and filtered view.
+    """
+
+    __slots__ = ("table", "positions")
+
+    def __init__(self, table: GameTable, positions):
+        self.table = table
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return GameRows(self.table, self.positions[i])
+        return GameRow(self.table, int(self.positions[i]))
+
+    def __iter__(self):
+        table = self.table
+        for i in self.positions:
+            yield GameRow(table, int(i))
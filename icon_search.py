@@ -1,5 +1,74 @@
 import os
-from PIL import Image
+import struct
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.ico')
+
+def read_image_size(path: str) -> tuple[int, int]:
+    """
+    Read the dimensions of a PNG, JPEG or ICO file from its header, without decoding it.
+    Other formats fall back to PIL.
+
+    Args:
+        path (str): Path to the image file.
+
+    Returns:
+        tuple[int, int]: (width, height).
+
+    Raises:
+        OSError: If the file cannot be read or is not a valid image.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(26)
+        # PNG: signature, then the IHDR chunk
+        if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+
+        # JPEG: walk the segments up to the first start-of-frame
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            while True:
+                byte = f.read(1)
+                while byte and byte != b'\xff':
+                    byte = f.read(1)
+                while byte == b'\xff':
+                    byte = f.read(1)
+                if not byte:
+                    break
+                marker = byte[0]
+                if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                    continue  # markers without a length
+                if marker in (0xD9, 0xDA):
+                    break  # end of image / start of scan before any frame header
+                length_bytes = f.read(2)
+                if len(length_bytes) < 2:
+                    break
+                length = struct.unpack('>H', length_bytes)[0]
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    frame = f.read(5)
+                    if len(frame) < 5:
+                        break
+                    height, width = struct.unpack('>HH', frame[1:5])
+                    return width, height
+                f.seek(length - 2, 1)
+            raise OSError(f"No JPEG frame header in {path}")
+
+        # ICO: directory of images, PIL reports the largest one
+        if head[:4] == b'\x00\x00\x01\x00':
+            count = struct.unpack('<H', head[4:6])[0]
+            f.seek(6)
+            sizes = []
+            for _ in range(count):
+                entry = f.read(16)
+                if len(entry) < 16:
+                    break
+                sizes.append((entry[0] or 256, entry[1] or 256))
+            if sizes:
+                return max(sizes, key=lambda size: size[0] * size[1])
+            raise OSError(f"Empty icon directory in {path}")
+
+    from PIL import Image
+    with Image.open(path) as img:
+        return img.size
 
 def classify_images_by_size(images: list[str]) -> dict:
     """
@@ -28,8 +97,7 @@ def classify_images_by_size(images: list[str]) -> dict:
 
     for path in images:
         try:
-            with Image.open(path) as img:
-                w, h = img.size
+            w, h = read_image_size(path)
         except Exception:
             classified["others"].append(path)
             continue
@@ -62,6 +130,50 @@ def classify_images_by_size(images: list[str]) -> dict:
 
     return classified
 
+def build_librarycache_index(steam_path: str, previous: dict | None = None) -> dict:
+    """
+    Index and classify the images of every appid in appcache/librarycache in one pass.
+
+    Each appid directory is re-listed and re-classified only if its mtime changed
+    since the previous index, and image sizes are read from the file headers.
+
+    Args:
+        steam_path (str): The root path of the Steam installation.
+        previous (dict, optional): Index returned by a previous call, to reuse.
+
+    Returns:
+        dict: Map from appid string to {"mtime": directory mtime in ns, "images": classified images}.
+    """
+    base = os.path.join(os.path.normpath(steam_path), "appcache", "librarycache")
+    previous = previous or {}
+    index = {}
+    try:
+        entries = list(os.scandir(base))
+    except OSError:
+        return index
+
+    for entry in entries:
+        if not entry.name.isdigit():
+            continue
+        try:
+            if not entry.is_dir():
+                continue
+            mtime = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+
+        old = previous.get(entry.name)
+        if old is not None and old["mtime"] == mtime:
+            index[entry.name] = old
+            continue
+        try:
+            names = sorted(os.listdir(entry.path))
+        except OSError:
+            continue
+        candidates = [os.path.join(entry.path, fn) for fn in names if fn.lower().endswith(IMAGE_EXTENSIONS)]
+        index[entry.name] = {"mtime": mtime, "images": classify_images_by_size(candidates)}
+    return index
+
 def find_and_classify_steam_images(steam_path: str, appid: int) -> dict:
     """
     Search for all images containing the appid in appcache/librarycache and classify them.
@@ -81,8 +193,8 @@ def find_and_classify_steam_images(steam_path: str, appid: int) -> dict:
     # Raccogli tutti i file che contengono l'appid
     candidates = [
         os.path.join(base, fn)
-        for fn in os.listdir(base)
-        if fn.lower().endswith(('.png', '.jpg', '.jpeg', '.ico'))
+        for fn in sorted(os.listdir(base))
+        if fn.lower().endswith(IMAGE_EXTENSIONS)
     ]
 
-    return classify_images_by_size(candidates)
\ No newline at end of file
+    return classify_images_by_size(candidates)
@@ -1,8 +1,30 @@
-from PIL import Image, ImageFilter
-import matplotlib.pyplot as plt
 import numpy as np
-import os
-from rich.text import Text
+from rich.text import Text, Span
+from profiling import profiled
+from art_styles import quantize_colors, color_style, DEFAULT_COLOR_MODE
+
+# PIL is imported by the functions using it: the TUI draws its first frame
+# before any icon is converted, and its import is not free.
+
+# Bump whenever a change to the pipeline alters the produced art, so that
+# entries in the on-disk art cache (see art_cache.py) are not reused.
+ART_VERSION = 4
+
+ASCII_CHARS = " .:-=+*#%@░▒▓█"
+EDGE_THRESHOLD = 0.5
+# Images are decoded or reduced to at least this many pixels per cell before
+# the final LANCZOS resize, which then still has some detail to filter
+REDUCE_MARGIN = 2
+
+# Edge glyphs indexed by the codes produced in select_glyphs; code 0 is used for
+# angles that fall exactly on a band boundary, which draw nothing.
+EDGE_GLYPHS = np.array(["", "|", "-", "/", "\\"])
+
+# Brightness ramp indexed by the 0-255 grey level
+RAMP_GLYPHS = np.array([
+    ASCII_CHARS[max(0, min(int(level / 255 * (len(ASCII_CHARS) - 1)), len(ASCII_CHARS) - 1))]
+    for level in range(256)
+])
 
 def difference_of_gaussian(image, sigma1=1, sigma2=2):
     """
@@ -16,6 +38,7 @@ def difference_of_gaussian(image, sigma1=1, sigma2=2):
     Returns:
         PIL.Image: Image after applying DoG.
     """
+    from PIL import Image, ImageFilter
     img_blur1 = image.filter(ImageFilter.GaussianBlur(radius=sigma1))
     img_blur2 = image.filter(ImageFilter.GaussianBlur(radius=sigma2))
     dog_image = Image.fromarray(
@@ -39,20 +62,27 @@ def sobel_edge(image, edge_threshold=0.3):
     [rows, columns] = np.shape(image)
 
     arr_img = np.array(image)
+    arr_float = arr_img.astype(np.float64)
 
     mags = np.zeros(shape=(rows, columns))
     angles = np.zeros(shape=(rows, columns))
     arrx = np.zeros(shape=(rows, columns))
     arry = np.zeros(shape=(rows, columns))
 
-    for i in range(rows - 2):
-        for j in range(columns - 2):
-            gx = np.sum(np.multiply(Gx, arr_img[i:i + 3, j:j + 3]))  # x direction
-            gy = np.sum(np.multiply(Gy, arr_img[i:i + 3, j:j + 3]))  # y direction
-            arrx[i + 1, j + 1] = gx
-            arry[i + 1, j + 1] = gy
-            mags[i + 1, j + 1] = np.sqrt(gx ** 2 + gy ** 2)
-            angles[i + 1, j + 1] = np.atan2(gy, gx)
+    # Correlate the whole image with both kernels at once: every kernel tap is a
+    # shifted view of the image, so gx/gy are nine multiply-adds over arrays.
+    # The 1px border stays at zero, as with the old per-pixel loop.
+    if rows > 2 and columns > 2:
+        inner = (slice(1, rows - 1), slice(1, columns - 1))
+        for di in range(3):
+            for dj in range(3):
+                window = arr_float[di:di + rows - 2, dj:dj + columns - 2]
+                if Gx[di, dj] != 0.0:
+                    arrx[inner] += Gx[di, dj] * window
+                if Gy[di, dj] != 0.0:
+                    arry[inner] += Gy[di, dj] * window
+        mags[inner] = np.sqrt(arrx[inner] ** 2 + arry[inner] ** 2)
+        angles[inner] = np.arctan2(arry[inner], arrx[inner])
 
     mask = (mags/(mags.max()+ 1e-8)) > edge_threshold
     angles_masked = np.where(mask, angles, 0)
@@ -60,6 +90,7 @@ def sobel_edge(image, edge_threshold=0.3):
     # DEBUG -------------------------------------------------------------------------------------------------------
     DEBUG = False
     if(DEBUG == True):
+        import matplotlib.pyplot as plt  # debug only: importing it costs almost a second at startup
         h, w = arr_img.shape
         rgb_img = np.zeros((h, w, 3), dtype=np.uint8)
         for x in range(h):
@@ -93,96 +124,229 @@ def sobel_edge(image, edge_threshold=0.3):
 
     return angles_masked
 
-def image_to_ascii(image_path, in_width = 40, in_height = 40):
+def select_glyphs(arr_angle, arr_gray):
     """
-    Convert an image to colored ASCII art using edge detection and color mapping.
+    Choose the character of every cell: an edge glyph where an edge was detected,
+    otherwise a character from the brightness ramp.
 
     Args:
-        image_path (str): Path to the image file.
-        in_width (int): Target width for ASCII art.
-        in_height (int): Target height for ASCII art.
+        arr_angle (np.ndarray): Masked edge angles, 0 where there is no edge.
+        arr_gray (np.ndarray): Grayscale levels (uint8), same shape as arr_angle.
+
+    Returns:
+        np.ndarray: Array of one-character strings ("" for cells that draw nothing).
+    """
+    abs_theta = np.abs(arr_angle) / np.pi
+    positive = arr_angle > 0
+    codes = np.select(
+        [
+            (abs_theta >= 0.0) & (abs_theta < 0.05),
+            (abs_theta > 0.9) & (abs_theta <= 1.0),
+            (abs_theta > 0.45) & (abs_theta < 0.55),
+            (abs_theta > 0.05) & (abs_theta < 0.45),
+            (abs_theta > 0.55) & (abs_theta < 0.9),
+        ],
+        [
+            1,
+            1,
+            2,
+            np.where(positive, 3, 4),
+            np.where(positive, 4, 3),
+        ],
+        default=0,
+    )
+    return np.where(arr_angle != 0, EDGE_GLYPHS[codes], RAMP_GLYPHS[arr_gray])
+
+def build_ascii_text(glyphs, arr_colors, colors=DEFAULT_COLOR_MODE):
+    """
+    Assemble the glyph grid into a Rich Text, one line per row.
+
+    Colours are quantized to the colour mode first, then neighbouring cells of
+    a row that share a colour are merged into a single span, so the number of
+    spans follows the colour changes instead of the cell count. Spans carry
+    interned styles (see art_styles.color_style), not style strings to parse.
+
+    Args:
+        glyphs (np.ndarray): Grid of one-character strings, as returned by select_glyphs.
+        arr_colors (np.ndarray): RGB colours (uint8) of each cell, shape (rows, columns, 3).
+        colors (str): Colour mode, see art_styles.COLOR_MODES.
 
     Returns:
         rich.text.Text: Rich Text object with colored ASCII art.
     """
-    ASCII_CHARS = " .:-=+*#%@░▒▓█"
-    EDGE_THRESHOLD = 0.5
+    rows = glyphs.shape[0]
+    if rows == 0:
+        return Text()
 
-    # Check for transparent background
-    img = Image.open(image_path)
-    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
-        img = img.convert("RGBA")
-        background = Image.new("RGBA", img.size, (0, 0, 0, 255))
-        img = Image.alpha_composite(background, img).convert("RGB")
-    else:
-        img = img.convert("RGB")
+    plain = "".join("".join(row) + "\n" for row in glyphs.tolist())
 
-    img_colors = img
-    img = img.convert("L")
+    # Offsets of the drawn cells in `plain`: cells that draw nothing are skipped
+    # and every row is followed by a newline.
+    drawn = (glyphs != "").ravel()
+    row_of_cell = np.repeat(np.arange(rows), glyphs.shape[1])[drawn]
+    offsets = np.cumsum(drawn)[drawn] - 1 + row_of_cell
 
-    # Calculate width and height to fit terminal and maintain aspect ratio
+    packed = quantize_colors(arr_colors, colors).ravel()[drawn]
+    if len(packed) == 0:
+        # No columns (1px wide images) or nothing drawn: blank lines, no spans
+        return Text(plain)
+
+    starts = np.flatnonzero(np.concatenate(([True], (packed[1:] != packed[:-1]) | (row_of_cell[1:] != row_of_cell[:-1]))))
+    ends = np.append(starts[1:], len(packed)) - 1
+
+    spans = [Span(start, end, color_style(code))
+             for start, end, code in zip(offsets[starts].tolist(), (offsets[ends] + 1).tolist(), packed[starts].tolist())]
+
+    ascii_text = Text(plain)
+    ascii_text.spans = spans
+    return ascii_text
+
+def fit_art_size(image_width, image_height, in_width, in_height):
+    """
+    Size of the art of an image: as large as possible within the requested
+    size, keeping the aspect ratio of the image on cells twice as tall as wide.
+
+    Args:
+        image_width (int): Image width in pixels.
+        image_height (int): Image height in pixels.
+        in_width (int): Maximum width in cells.
+        in_height (int): Maximum height in cells.
+
+    Returns:
+        tuple[int, int]: Width and height in cells, at least 1.
+    """
     # ASCII characters are taller than wide, so adjust aspect ratio
-    aspect_ratio = img.height / img.width
+    aspect_ratio = image_height / image_width
     char_aspect = 0.5  # typical ASCII char height/width ratio
 
-    term_size = os.get_terminal_size()
-    max_width = min(in_width, term_size.columns)
-    max_height = min(in_height, term_size.lines)
+    fit_height = int(in_width * (aspect_ratio * char_aspect))
+    fit_width = int(in_height / (aspect_ratio * char_aspect))
 
-    fit_height = int(max_width * (aspect_ratio * char_aspect))
-    fit_width = int(max_height / (aspect_ratio * char_aspect))
-
-    if max_height < fit_height:
-        height = max_height
+    if in_height < fit_height:
+        height = in_height
         width = fit_width
     else:
         height = fit_height
-        width = max_width
+        width = in_width
+    return max(1, width), max(1, height)
+
+def decode_reduced(img, min_size):
+    """
+    Decode an opened image at the lowest resolution that is still at least
+    min_size (or its full size, if smaller), in RGB or, for transparent
+    images, premultiplied RGBa.
+
+    JPEGs are decoded at a reduced resolution (draft), other images are then
+    shrunk by an integer factor (reduce). Resampling premultiplied alpha gives
+    colour channels equal to the image composited over black, so no
+    compositing pass at full size is needed.
+
+    Args:
+        img (PIL.Image.Image): Image just opened, not loaded yet.
+        min_size (tuple[int, int]): Minimum width and height in pixels.
+
+    Returns:
+        PIL.Image.Image: The decoded image, in mode "RGB" or "RGBa".
+    """
+    # Only JPEGs support it: scales the DCT down by up to 8 while decoding
+    img.draft("RGB", min_size)
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        img = (img if img.mode == "RGBA" else img.convert("RGBA")).convert("RGBa")
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
 
-    width = max(1, width)
-    height = max(1, height)
+    factor = min(img.width // max(1, min_size[0]), img.height // max(1, min_size[1]))
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
 
-    img_resized = img.resize((width, height), Image.Resampling.LANCZOS)
+def resample_colors(img, width, height):
+    """
+    Args:
+        img (PIL.Image.Image | np.ndarray): Image in mode "RGB" or "RGBa", or RGB array (uint8).
+        width (int): Width in cells.
+        height (int): Height in cells.
+
+    Returns:
+        np.ndarray: RGB colours (uint8) of each cell, shape (height, width, 3).
+    """
+    from PIL import Image
+    if isinstance(img, np.ndarray):
+        img = Image.fromarray(img)
+    img = img.resize((width, height), Image.Resampling.LANCZOS)
+    return np.asarray(img)[:, :, :3]
+
+def load_colors(image_path, in_width, in_height):
+    """
+    Decode an image straight to its art size, as RGB over a black background,
+    so the LANCZOS resize only sees a few pixels per cell instead of the full
+    image (see decode_reduced).
+
+    Args:
+        image_path (str): Path to the image file.
+        in_width (int): Maximum width in cells.
+        in_height (int): Maximum height in cells.
+
+    Returns:
+        np.ndarray: RGB colours (uint8) of each cell, shape (height, width, 3).
+    """
+    from PIL import Image
+    img = Image.open(image_path)
+    width, height = fit_art_size(img.width, img.height, in_width, in_height)
+    img = decode_reduced(img, (width * REDUCE_MARGIN, height * REDUCE_MARGIN))
+    return resample_colors(img, width, height)
+
+def to_gray(arr_colors):
+    """
+    Args:
+        arr_colors (np.ndarray): RGB colours (uint8), shape (rows, columns, 3).
+
+    Returns:
+        np.ndarray: Grey levels (uint8), with the ITU-R 601-2 weights PIL uses for mode "L".
+    """
+    rgb = arr_colors.astype(np.uint32)
+    return ((rgb[:, :, 0] * 19595 + rgb[:, :, 1] * 38470 + rgb[:, :, 2] * 7471 + 0x8000) >> 16).astype(np.uint8)
 
-    img_dog = difference_of_gaussian(img_resized, sigma1=1, sigma2=2)
+def colors_to_ascii(arr_colors, colors=DEFAULT_COLOR_MODE):
+    """
+    Turn the cell colours of an image into ASCII art: edge glyphs where the
+    grey levels have edges, the brightness ramp elsewhere.
+
+    Args:
+        arr_colors (np.ndarray): RGB colours (uint8) of each cell, shape (rows, columns, 3).
+        colors (str): Colour mode, see art_styles.COLOR_MODES.
+
+    Returns:
+        rich.text.Text: Rich Text object with colored ASCII art.
+    """
+    from PIL import Image
+    arr_gray = to_gray(arr_colors)
+    height, width = arr_gray.shape
+
+    img_dog = difference_of_gaussian(Image.fromarray(arr_gray), sigma1=1, sigma2=2)
 
     border_size = 1
     img_dog_bordered = Image.new("L", (img_dog.width + 2 * border_size, img_dog.height + 2 * border_size), 128)
     img_dog_bordered.paste(img_dog, (border_size, border_size))
 
-    # Use the new sobel_edge_rgb function
+    # Edge angles of the DoG image, 0 where the gradient is weak
     arr_angle = sobel_edge(img_dog_bordered, EDGE_THRESHOLD)
 
-    # Resize the original image to match the output size for ASCII background
-    arr_gray = np.array(img_resized)
-    
-    img_colors = img_colors.resize((width, height), Image.Resampling.LANCZOS)
-    arr_colors = np.array(img_colors)
-
-    ascii_text = Text()
-    for y in range(height-1):
-        for x in range(width-1):
-            char = ""
-            theta = arr_angle[y,x]
-            if theta != 0:
-                absTheta = abs(theta) / np.pi
-                if ((0.0 <= absTheta) and (absTheta < 0.05)):
-                    char = '|'
-                elif ((0.9 < absTheta) and (absTheta <= 1.0)):
-                    char = '|'
-                elif ((0.45 < absTheta) and (absTheta < 0.55)):
-                    char =  '-'
-                elif (0.05 < absTheta and absTheta < 0.45):
-                    char = '/' if np.sign(theta) > 0 else '\\'
-                elif (0.55 < absTheta and absTheta < 0.9):
-                    char = '\\' if np.sign(theta) > 0 else '/'
-                ascii_text.append(char, style=f"rgb({arr_colors[y, x][0]},{arr_colors[y, x][1]},{arr_colors[y, x][2]})")
-            else:
-                idx = int(arr_gray[y, x] / 255 * (len(ASCII_CHARS) - 1))
-                idx = max(0, min(idx, len(ASCII_CHARS) - 1))
-                char = ASCII_CHARS[idx]
-                ascii_text.append(char, style=f"rgb({arr_colors[y, x][0]},{arr_colors[y, x][1]},{arr_colors[y, x][2]})")
-        if y < height-1:
-            ascii_text.append("\n")
-
-    return ascii_text
\ No newline at end of file
+    glyphs = select_glyphs(arr_angle[:height - 1, :width - 1], arr_gray[:height - 1, :width - 1])
+    return build_ascii_text(glyphs, arr_colors[:height - 1, :width - 1], colors)
+
+@profiled("image_to_ascii")
+def image_to_ascii(image_path, in_width = 40, in_height = 40, colors = DEFAULT_COLOR_MODE):
+    """
+    Convert an image to colored ASCII art using edge detection and color mapping.
+
+    Args:
+        image_path (str): Path to the image file.
+        in_width (int): Target width for ASCII art. Callers clamp it to the terminal (see art_cache.fit_to_terminal).
+        in_height (int): Target height for ASCII art.
+        colors (str): Colour mode, see art_styles.COLOR_MODES.
+
+    Returns:
+        rich.text.Text: Rich Text object with colored ASCII art.
+    """
+    return colors_to_ascii(load_colors(image_path, in_width, in_height), colors)
@@ -0,0 +1,91 @@
+"""
+layout.py
+
+Sizes of the TUI panels, shared with warm_cache.py so that art rendered ahead
+of time has the size the interface asks for.
+"""
+
+import os
+from datetime import datetime
+from rich.console import Console
+from rich.text import Text
+from rich.cells import cell_len
+
+# Layout proportions of the library list and details panel
+LEFT_RATIO = 1
+RIGHT_RATIO = 3
+
+# Only used to wrap text, never printed to
+_console = Console()
+
+def estimate_entry_height(entry, width=28):
+    """
+    Estimate the number of lines needed to display a game entry.
+
+    Args:
+        entry (str): The game name.
+        width (int): The width for wrapping.
+
+    Returns:
+        int: Number of lines required.
+    """
+    entry = "➤ " + entry
+    if "\n" not in entry and "\t" not in entry and cell_len(entry) <= width:
+        return 1  # fits on one line, no need to wrap
+    text = Text(entry)
+    lines = text.wrap(_console, width, tab_size=4)
+    return len(lines)
+
+def build_info_text(current_game, palette):
+    """
+    Build the text shown in the details panel for a game.
+
+    Args:
+        current_game (dict): The game to describe.
+        palette (dict): Theme, as returned by load_themes.get_themes.
+
+    Returns:
+        Text: Rich Text with title, details and play times.
+    """
+    info_title = Text(f"{current_game['name']} \n", style=palette['game_title'])
+    info_details = Text(f"\n\nAppId: {current_game['appid']}\nExe: {current_game['exe']}\nCategory: {current_game['category']}\nIcon: {current_game['icon']}", style=palette['info'])
+
+    info_text = Text()
+    info_text.append(info_title)
+    info_text.append(info_details)
+
+    if(current_game['last_played'] != 0):
+        last_played = datetime.fromtimestamp(current_game['last_played'])
+        last_player = last_played.strftime("%b %d %Y %H:%M")
+        last_played_text = Text(f"\n\nLast Played: {last_player}", style=palette['time'])
+        info_text.append(last_played_text)
+
+    if(current_game['play_time'] != 0):
+        play_time = current_game['play_time']
+        play_time_hours = play_time / 60
+        play_time_minutes = play_time % 60
+        play_time_text = Text(f"\n\nPlay Time: {play_time_hours:.0f} hours {play_time_minutes} minutes", style=palette['time'])
+        info_text.append(play_time_text)
+
+    return info_text
+
+def compute_icon_size(info_text, term_size: os.terminal_size):
+    """
+    Compute the size of the icon art that fits next to the details text.
+
+    Args:
+        info_text (Text): Details text of the game, as built by build_info_text.
+        term_size (os.terminal_size): Size of the terminal.
+
+    Returns:
+        tuple: (icon_width, icon_height) in cells.
+    """
+    max_height = term_size.lines - 6
+    max_width = term_size.columns - 6
+
+    icon_padding = 2
+    right_width =  max_width*(RIGHT_RATIO/(LEFT_RATIO+RIGHT_RATIO))
+    right_width -= estimate_entry_height(info_text.__str__(), int(right_width))
+    icon_width = int(right_width + icon_padding)
+    icon_height = int(max_height/2)
+    return icon_width, icon_height
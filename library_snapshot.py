@@ -0,0 +1,257 @@
+"""
+library_snapshot.py
+
+Persisted results of parsing the Steam library files, keyed by file fingerprint,
+so that a rescan only re-parses the files that changed.
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+from cache_paths import get_cache_dir
+
+# Bump when the stored parse results change shape
+SNAPSHOT_VERSION = 2
+# Bytes before the offset an append-only file was read up to that must be
+# unchanged for parse_appending to resume there; they cover the last lines read
+APPEND_CHECK_BYTES = 4096
+
+def fingerprint(path: str) -> tuple[int, int] | None:
+    """
+    Args:
+        path (str): File or directory path.
+
+    Returns:
+        tuple[int, int] | None: (mtime in ns, size) or None if the path cannot be stat'ed.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def tail_digest(path: str, end: int) -> bytes | None:
+    """
+    Args:
+        path (str): File path.
+        end (int): Byte offset.
+
+    Returns:
+        bytes | None: Digest of the APPEND_CHECK_BYTES bytes before end, or None if they cannot be read.
+    """
+    start = max(0, end - APPEND_CHECK_BYTES)
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+    except OSError:
+        return None
+    if len(data) != end - start:
+        return None
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+class LibrarySnapshot:
+    """
+    Memoizes per-file parse results across runs.
+
+    Each entry is stored under (kind, path) together with the (mtime, size)
+    fingerprint of the file it was parsed from, and is reused as long as the
+    fingerprint does not change. A scan is wrapped in begin_scan()/end_scan():
+    entries that were not requested during the scan (e.g. removed
+    appmanifests) are dropped, and the snapshot is written back only if
+    something changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self._seen = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "LibrarySnapshot":
+        """
+        Load a snapshot from disk, starting empty if it is missing, corrupt or outdated.
+
+        Args:
+            path (str): Path of the snapshot file.
+
+        Returns:
+            LibrarySnapshot: The snapshot.
+        """
+        snapshot = cls(path)
+        try:
+            with open(path, "rb") as f:
+                version, entries = pickle.load(f)
+            if version == SNAPSHOT_VERSION:
+                snapshot.entries = entries
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+            pass
+        return snapshot
+
+    def begin_scan(self):
+        """
+        Start tracking which entries are used by the current scan.
+        """
+        with self._lock:
+            self._seen = set()
+
+    def end_scan(self):
+        """
+        Drop the entries the scan did not use and save the snapshot if it changed.
+        """
+        with self._lock:
+            stale = [key for key in self.entries if key not in self._seen]
+            for key in stale:
+                del self.entries[key]
+            if stale:
+                self._dirty = True
+            dirty = self._dirty
+        if dirty:
+            self.save()
+
+    def parse(self, kind: str, path: str, parse_fn):
+        """
+        Return parse_fn(path), reusing the stored result if the file is unchanged.
+
+        Args:
+            kind (str): Namespace of the entry (e.g. 'manifest').
+            path (str): File the result is parsed from.
+            parse_fn (callable): Function parsing the file; exceptions propagate.
+
+        Returns:
+            The parse result. It is shared with the snapshot and must not be mutated.
+        """
+        key = (kind, path)
+        fp = fingerprint(path)
+        with self._lock:
+            self._seen.add(key)
+            entry = self.entries.get(key)
+        if fp is not None and entry is not None and entry[0] == fp:
+            return entry[1]
+
+        value = parse_fn(path)
+        if fp is not None:
+            with self._lock:
+                self.entries[key] = (fp, value)
+                self._dirty = True
+        return value
+
+    def parse_appending(self, kind: str, path: str, read_fn):
+        """
+        Like parse(), for append-only files: when the file only grew, read_fn is
+        asked to read the new bytes and extend the previous result. The file
+        counts as grown only if the last bytes read before are still the same,
+        so a file replaced by a longer one (Steam starts a new
+        gameprocess_log.txt at each launch) is read again from the start.
+
+        Args:
+            kind (str): Namespace of the entry (e.g. 'gameprocess').
+            path (str): File the result is parsed from.
+            read_fn (callable): read_fn(path, start, previous) -> (result, end_offset).
+
+        Returns:
+            The parse result. It is shared with the snapshot and must not be mutated.
+        """
+        key = (kind, path)
+        fp = fingerprint(path)
+        with self._lock:
+            self._seen.add(key)
+            entry = self.entries.get(key)
+        if fp is not None and entry is not None and entry[0] == fp:
+            return entry[1][0]
+
+        start, previous = 0, None
+        if fp is not None and entry is not None and fp[1] >= entry[1][1]:
+            previous_value, previous_end, digest = entry[1]
+            if digest is not None and tail_digest(path, previous_end) == digest:
+                previous, start = previous_value, previous_end
+        value, end = read_fn(path, start, previous)
+        if fp is not None:
+            with self._lock:
+                self.entries[key] = (fp, (value, end, tail_digest(path, end)))
+                self._dirty = True
+        return value
+
+    def update(self, kind: str, path: str, update_fn):
+        """
+        Return update_fn(path, previous), for results that check their own
+        freshness (e.g. a directory index keyed by per-entry mtimes).
+
+        Args:
+            kind (str): Namespace of the entry (e.g. 'librarycache').
+            path (str): Path the result is built from.
+            update_fn (callable): update_fn(path, previous) -> result; returning previous unchanged means nothing changed.
+
+        Returns:
+            The result. It is shared with the snapshot and must not be mutated.
+        """
+        key = (kind, path)
+        with self._lock:
+            self._seen.add(key)
+            entry = self.entries.get(key)
+        previous = entry[1] if entry is not None else None
+        value = update_fn(path, previous)
+        if value != previous:
+            with self._lock:
+                self.entries[key] = (None, value)
+                self._dirty = True
+        return value
+
+    def cached(self, kind: str, path: str):
+        """
+        Return the result stored by parse() or update() without checking the file on disk.
+
+        Args:
+            kind (str): Namespace of the entry.
+            path (str): Path the result was parsed from.
+
+        Returns:
+            The stored result, or None. It is shared with the snapshot and must not be mutated.
+        """
+        with self._lock:
+            entry = self.entries.get((kind, path))
+        return entry[1] if entry is not None else None
+
+    def flush(self):
+        """
+        Save the snapshot if it changed since it was last saved, without pruning entries.
+        """
+        if self._dirty:
+            self.save()
+
+    def save(self):
+        """
+        Write the snapshot to disk atomically. Errors are ignored: the snapshot is only a cache.
+        """
+        with self._lock:
+            payload = pickle.dumps((SNAPSHOT_VERSION, self.entries), protocol=pickle.HIGHEST_PROTOCOL)
+            self._dirty = False
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+_snapshots = {}
+
+def get_snapshot(cache_dir: str | None = None) -> LibrarySnapshot:
+    """
+    Return the snapshot stored in a cache directory, loading it once per process.
+
+    Args:
+        cache_dir (str, optional): Cache directory, defaults to cache_paths.get_cache_dir().
+
+    Returns:
+        LibrarySnapshot: The shared snapshot.
+    """
+    path = os.path.join(cache_dir or get_cache_dir(), "library.pickle")
+    snapshot = _snapshots.get(path)
+    if snapshot is None:
+        snapshot = _snapshots[path] = LibrarySnapshot.load(path)
+    return snapshot
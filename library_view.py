@@ -0,0 +1,89 @@
+"""
+library_view.py
+
+Sorted and filtered views of the game list, cached between keypresses.
+"""
+
+import numpy as np
+from search import SearchIndex, normalize
+from game_table import GameTable, GameRows
+
+# Fields the list can be sorted by, in the order the sort key cycles through them
+SORT_MODES = ["name", "category", "last_played", "play_time"]
+
+class LibraryView:
+    """
+    Serves the game list as shown by the UI: filtered by the search query and
+    sorted by one of the sort modes.
+
+    The order of every (sort mode, direction) pair is computed once, on first
+    use, with an argsort of the table column. Filtering then keeps the matches
+    in that order with a boolean mask, so the rows are never copied: the result
+    is a view of the table at the selected positions. When a character is
+    typed, only the previous result is filtered, not the whole order. The last result is
+    returned as is while the query, sort and games do not change, so moving
+    the cursor does no list work. A view is built for one table of games:
+    when the games change, build a new one.
+    """
+
+    def __init__(self, games: GameTable):
+        self.games = games
+        self.search_index = SearchIndex(games)
+        self._orders = {}
+        self._last_args = None
+        self._last = None
+
+    def order(self, sort_mode: str, sort_ascending: bool) -> np.ndarray:
+        """
+        Args:
+            sort_mode (str): The field to sort by.
+            sort_ascending (bool): Sort order, True for descending.
+
+        Returns:
+            np.ndarray: Positions in games in sorted order.
+        """
+        order = self._orders.get((sort_mode, sort_ascending))
+        if order is None:
+            order = self._orders[(sort_mode, sort_ascending)] = self.games.order(sort_mode, descending=sort_ascending)
+        return order
+
+    def select(self, query: str, sort_mode: str, sort_ascending: bool, fuzzy: bool = False) -> GameRows:
+        """
+        Filter and sort the games, as sorting them with a stable sort and then
+        keeping the matches would. Fuzzy matches keep their ranking instead.
+
+        Args:
+            query (str): Search string.
+            sort_mode (str): The field to sort by.
+            sort_ascending (bool): Sort order, True for descending.
+            fuzzy (bool): Match the query characters in order instead of as a substring.
+
+        Returns:
+            GameRows: The games to show.
+        """
+        args = (query, sort_mode, sort_ascending, fuzzy and query != "")
+        if args == self._last_args:
+            return self._last
+
+        if query != "" and fuzzy:
+            positions = self.search_index.fuzzy_search(query)
+        else:
+            order = self.order(sort_mode, sort_ascending)
+            if query == "":
+                positions = order
+            else:
+                matches = np.zeros(len(self.games), dtype=bool)
+                matches[self.search_index.search(query)] = True
+                # A longer query only drops games from the previous result, which is already sorted
+                last = self._last_args
+                if (last is not None and last[1:] == args[1:] and last[0] != ""
+                        and normalize(query).startswith(normalize(last[0]))):
+                    positions = self._last.positions
+                else:
+                    positions = order
+                positions = positions[matches[positions]]
+        selected = self.games.rows(positions)
+
+        self._last_args = args
+        self._last = selected
+        return selected
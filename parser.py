@@ -1,31 +1,66 @@
 import re
+import mmap
 import struct
 import os
 import vdf
+from vdf_stream import load_selected
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
-TYPE_END = 0x08
+# Binary VDF value types
+TYPE_MAP = 0x00
 TYPE_STRING = 0x01
 TYPE_INT32 = 0x02
+TYPE_FLOAT32 = 0x03
+TYPE_POINTER = 0x04
+TYPE_WSTRING = 0x05
+TYPE_COLOR = 0x06
+TYPE_UINT64 = 0x07
+TYPE_END = 0x08
+TYPE_INT64 = 0x0A
+TYPE_END_ALT = 0x0B
+
+_UINT32 = struct.Struct('<I')
+_FLOAT32 = struct.Struct('<f')
+_UINT64 = struct.Struct('<Q')
+_INT64 = struct.Struct('<q')
+
+def read_cstring(buf, pos: int) -> tuple[bytes, int]:
+    """
+    Read a null-terminated string from a buffer.
+
+    Args:
+        buf (bytes | mmap.mmap): Buffer holding binary VDF data.
+        pos (int): Offset of the first byte of the string.
+
+    Returns:
+        tuple[bytes, int]: The string bytes and the offset just past the terminator.
+    """
+    end = buf.find(b'\x00', pos)
+    if end < 0:
+        raise ValueError(f"Unterminated string at offset {pos}")
+    return buf[pos:end], end + 1
 
-def read_cstring_bytes(f) -> bytes:
+def read_wstring(buf, pos: int) -> tuple[str, int]:
     """
-    Read a null-terminated string as bytes from a file object.
+    Read a null-terminated UTF-16LE string from a buffer.
 
     Args:
-        f (file): File object opened in binary mode.
+        buf (bytes | mmap.mmap): Buffer holding binary VDF data.
+        pos (int): Offset of the first byte of the string.
 
     Returns:
-        bytes: The read bytes up to the null terminator.
+        tuple[str, int]: The decoded string and the offset just past the terminator.
     """
-    buf = bytearray()
+    end = pos
     while True:
-        b = f.read(1)
-        if not b or b == b'\x00':
+        end = buf.find(b'\x00\x00', end)
+        if end < 0:
+            raise ValueError(f"Unterminated wide string at offset {pos}")
+        if (end - pos) % 2 == 0:
             break
-        buf.extend(b)
-    return bytes(buf)
+        end += 1
+    return buf[pos:end].decode('utf-16-le', errors='replace'), end + 2
 
 def decode_safe(b: bytes) -> str:
     """
@@ -42,6 +77,136 @@ def decode_safe(b: bytes) -> str:
     except UnicodeDecodeError:
         return b.decode('latin1', errors='replace')
 
+def read_binary_value(buf, pos: int, t: int, keys: Dict[bytes, str] | None = None) -> tuple[Any, int]:
+    """
+    Read the value of a binary VDF entry whose type and key were already consumed.
+
+    INT32, POINTER and COLOR values are returned unsigned, which is how Steam
+    uses them for shortcut appids.
+
+    Args:
+        buf (bytes | mmap.mmap): Buffer holding binary VDF data.
+        pos (int): Offset of the value.
+        t (int): Type byte of the entry.
+        keys (Dict[bytes, str], optional): Cache of decoded keys shared while parsing one file.
+
+    Returns:
+        tuple[Any, int]: The value and the offset of the next entry.
+    """
+    if t == TYPE_MAP:
+        return read_binary_map(buf, pos, keys)
+    if t == TYPE_STRING:
+        raw, pos = read_cstring(buf, pos)
+        return decode_safe(raw), pos
+    if t in (TYPE_INT32, TYPE_POINTER, TYPE_COLOR):
+        size, fmt = 4, _UINT32
+    elif t == TYPE_FLOAT32:
+        size, fmt = 4, _FLOAT32
+    elif t == TYPE_UINT64:
+        size, fmt = 8, _UINT64
+    elif t == TYPE_INT64:
+        size, fmt = 8, _INT64
+    elif t == TYPE_WSTRING:
+        return read_wstring(buf, pos)
+    else:
+        raise ValueError(f"Unknown binary VDF type 0x{t:02x} at offset {pos}")
+    if pos + size > len(buf):
+        raise ValueError(f"Truncated value at offset {pos}")
+    return fmt.unpack_from(buf, pos)[0], pos + size
+
+def read_binary_map(buf, pos: int, keys: Dict[bytes, str] | None = None) -> tuple[Dict[str, Any], int]:
+    """
+    Read the entries of a binary VDF map up to its end marker.
+
+    Strings and INT32 values, which make up almost all of shortcuts.vdf, are
+    decoded inline; other types go through read_binary_value.
+
+    Args:
+        buf (bytes | mmap.mmap): Buffer holding binary VDF data.
+        pos (int): Offset of the first entry of the map.
+        keys (Dict[bytes, str], optional): Cache of decoded keys shared while parsing one file.
+
+    Returns:
+        tuple[Dict[str, Any], int]: The map, with nested maps as dicts, and the offset past its end marker.
+    """
+    if keys is None:
+        keys = {}
+    result = {}
+    find = buf.find
+    size = len(buf)
+    while True:
+        if pos >= size:
+            raise ValueError("Unexpected end of file inside a map")
+        t = buf[pos]
+        if t == TYPE_END or t == TYPE_END_ALT:
+            return result, pos + 1
+
+        end = find(b'\x00', pos + 1)
+        if end < 0:
+            raise ValueError(f"Unterminated key at offset {pos + 1}")
+        raw_key = buf[pos + 1:end]
+        key = keys.get(raw_key)
+        if key is None:
+            key = keys[raw_key] = decode_safe(raw_key)
+        pos = end + 1
+
+        if t == TYPE_STRING:
+            end = find(b'\x00', pos)
+            if end < 0:
+                raise ValueError(f"Unterminated string at offset {pos}")
+            raw = buf[pos:end]
+            try:
+                value = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                value = decode_safe(raw)
+            pos = end + 1
+        elif t == TYPE_INT32:
+            if pos + 4 > size:
+                raise ValueError(f"Truncated value at offset {pos}")
+            value = _UINT32.unpack_from(buf, pos)[0]
+            pos += 4
+        else:
+            value, pos = read_binary_value(buf, pos, t, keys)
+        result[key] = value
+
+def iter_shortcuts(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily parse the binary shortcuts.vdf file, one shortcut at a time.
+
+    The file is memory-mapped and each shortcut is decoded only when the
+    iterator reaches it. Nested maps such as 'tags' are kept as dicts and every
+    binary VDF type is supported. A truncated trailing shortcut is skipped.
+
+    Args:
+        path (str): Path to the shortcuts.vdf file.
+
+    Yields:
+        Dict[str, Any]: One shortcut, with keys as stored by Steam (e.g. 'appid', 'AppName', 'Exe', 'tags').
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("File vuoto o marker non trovato.")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            # Root: a single map (usually "shortcuts") holding one map per shortcut
+            if buf[0] != TYPE_MAP:
+                raise ValueError("File vuoto o marker non trovato.")
+            _, pos = read_cstring(buf, 1)
+
+            keys = {}
+            size = len(buf)
+            while pos < size:
+                t = buf[pos]
+                pos += 1
+                if t in (TYPE_END, TYPE_END_ALT):
+                    break
+                try:
+                    _, pos = read_cstring(buf, pos)
+                    value, pos = read_binary_value(buf, pos, t, keys)
+                except ValueError:
+                    break  # evita crash su file tagliato
+                if isinstance(value, dict):
+                    yield value
+
 def get_shortcuts(path: str) -> List[Dict[str, Any]]:
     """
     Parse the binary shortcuts.vdf file and return a list of shortcuts.
@@ -52,93 +217,97 @@ def get_shortcuts(path: str) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: List of shortcut dictionaries.
     """
-    shortcuts = []
+    return list(iter_shortcuts(path))
 
-    known_keys = {
-        "appname", "exe", "StartDir", "icon", "ShortcutPath", "LaunchOptions",
-        "IsHidden", "AllowDesktopConfig", "AllowOverlay", "OpenVR", "Devkit",
-        "DevkitGameID", "DevkitOverrideAppID", "LastPlayTime", "FlatpakAppID"
-    }
+GAMEPROCESS_ADD_RE = re.compile(r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] AppID (\d+) adding PID (\d+) as a tracked process ""(.+?)""')
 
-    with open(path, 'rb') as f:
-        # Cerca il primo marker valido (0x01 o 0x02) per saltare padding/corruzione iniziale
-        while True:
-            b = f.read(1)
-            if not b:
-                raise ValueError("File vuoto o marker non trovato.")
-            if b[0] in (TYPE_STRING, TYPE_INT32, TYPE_END):
-                f.seek(-1, 1)  # torna indietro di 1 byte
-                break
-
-        current = {}
-        while True:
-            marker = f.read(1)
-            if not marker:
-                break
-
-            t = marker[0]
-
-            if t == TYPE_END:
-                if current:
-                    shortcuts.append(current)
-                    current = {}
-                continue
+def normalize_exe_path(path: str) -> str:
+    """
+    Normalize an executable path for lookups: strip quotes and whitespace,
+    collapse separators and fold case where the OS does.
 
-            if t not in (TYPE_STRING, TYPE_INT32):
-                continue  # ignora marker sconosciuti
-
-            raw_key = read_cstring_bytes(f)
-            # Pulisce i byte della chiave da caratteri non stampabili
-            clean_key = bytes(b for b in raw_key if 0x20 <= b <= 0x7E)
-            decoded_key = decode_safe(clean_key)
-            
-            # Cerca una chiave conosciuta anche se ci sono caratteri spuri
-            key = None
-            for known in known_keys:
-                if known in decoded_key:
-                    key = known
-                    break
+    Args:
+        path (str): Executable path or command.
 
-            if not key:
-                parts = [p for p in decoded_key.split() if p.isidentifier()]
-                key = parts[-1] if parts else decoded_key.strip()
-
-            # ⚠️ Forza il tipo STRING se è "appname"
-            if key == "appname":
-                t = TYPE_STRING
-            
-            if t == TYPE_STRING:
-                raw_val = read_cstring_bytes(f)
-                val = decode_safe(raw_val)
-            else:  # TYPE_INT32
-                val_bytes = f.read(4)
-                if len(val_bytes) < 4:
-                    break  # evita crash su file tagliato
-                val = struct.unpack('<I', val_bytes)[0]
+    Returns:
+        str: Normalized path.
+    """
+    return os.path.normcase(os.path.normpath(path.strip().strip('"')))
+
+def read_gameprocess_log(gameprocess_log_path, start=0, index=None):
+    """
+    Collect the last "adding PID" entry of every AppID and executable in gameprocess_log.txt.
+
+    The log is append-only, so a previous result can be extended by passing it
+    back with the offset it returned: only the bytes written since are read.
+
+    Args:
+        gameprocess_log_path (str): Path to the Steam gameprocess_log.txt.
+        start (int): Byte offset to resume from.
+        index (dict, optional): Result of a previous call to extend.
 
-            current[key] = val
+    Returns:
+        tuple: (index, end) where index maps ('id', appid) and ('exe', normalized path)
+            to (offset, timestamp) of the last matching line, and end is the offset
+            just past the last complete line read.
+    """
+    index = dict(index) if index else {}
+    end = start
+    with open(gameprocess_log_path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break  # line still being written, read it next time
+            line_offset = offset
+            offset += len(raw)
+            end = offset
+            if b'adding PID' not in raw:
+                continue
+            m = GAMEPROCESS_ADD_RE.match(raw.decode('utf-8', errors='replace'))
+            if m:
+                timestamp, appid, pid, exe_path = m.groups()
+                index[('id', appid)] = (line_offset, timestamp)
+                index[('exe', normalize_exe_path(exe_path))] = (line_offset, timestamp)
+    return index, end
+
+def apply_gameprocess_playtimes(games, index):
+    """
+    Update the 'last_played' field of games from a read_gameprocess_log index.
 
-    return shortcuts
+    A game matches on its rungameid 'id' or on its normalized 'exe'; when both
+    match, the later log line wins.
+
+    Args:
+        games (list): List of game dictionaries.
+        index (dict): Index returned by read_gameprocess_log.
+    """
+    for game in games:
+        hits = [index.get(('id', str(game['id']))) if 'id' in game else None,
+                index.get(('exe', normalize_exe_path(game['exe']))) if game.get('exe') else None]
+        hits = [hit for hit in hits if hit is not None]
+        if hits:
+            timestamp = max(hits)[1]
+            dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+            game["last_played"] = int(dt.timestamp())
 
 def get_shortcut_last_playtime(games, gameprocess_log_path):
     """
     Update the 'last_played' field for shortcuts using the gameprocess_log.txt.
 
+    The log is read once into an index (see read_gameprocess_log) that is then
+    joined with the games, so the cost is linear in the log size.
+
     Args:
         games (list): List of game dictionaries.
         gameprocess_log_path (str): Path to the Steam gameprocess_log.txt.
     """
-    pattern_add = r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] AppID (\d+) adding PID (\d+) as a tracked process ""(.+?)""'
+    index, _ = read_gameprocess_log(gameprocess_log_path)
+    apply_gameprocess_playtimes(games, index)
 
-    for line in open(gameprocess_log_path, 'r', encoding='utf-8'):
-        m = re.match(pattern_add, line)
-        if m:
-            timestamp, appid, pid, exe_path = m.groups()
-            for game in games:
-                id = game.get('id', None)
-                if(exe_path in game['exe']) or (str(id) == appid):
-                    dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-                    game["last_played"] = int(dt.timestamp())
+# Fields read from appmanifest_*.acf and localconfig.vdf, see vdf_stream.load_selected
+APPMANIFEST_FIELDS = ["AppState/{appid,name,LastPlayed,SizeOnDisk}"]
+LOCALCONFIG_FIELDS = ["UserLocalConfigStore/Software/Valve/Steam/apps/*/{LastPlayed,Playtime}"]
 
 def get_steam_libraries(steam_path):
     """
@@ -179,41 +348,82 @@ def get_installed_games(library_path):
     # BytesToStage, BytesStaged, TargetBuildID', AutoUpdateBehavior, AllowOtherDownloadsWhileRunning,
     # ScheduledAutoUpdate, InstalledDepots, InstallScripts, SharedDepots, UserConfig, MountedConfig
 
+    return [read_appmanifest(path) for path in list_appmanifests(library_path)]
+
+def list_appmanifests(library_path):
+    """
+    List the appmanifest files of a Steam library folder.
+
+    Args:
+        library_path (str): Path to the Steam library.
+
+    Returns:
+        list: Sorted paths of the appmanifest_*.acf files.
+    """
     steamapps = os.path.join(library_path, "steamapps")
-    games = []
-    for fname in os.listdir(steamapps):
-        if fname.startswith("appmanifest") and fname.endswith(".acf"):
-            with open(os.path.join(steamapps, fname), encoding='utf-8') as f:
-                appdata = vdf.load(f)
-                info = appdata['AppState']
-                games.append(info)
-    return games
+    return sorted(
+        os.path.join(steamapps, fname)
+        for fname in os.listdir(steamapps)
+        if fname.startswith("appmanifest") and fname.endswith(".acf")
+    )
+
+def read_appmanifest(path):
+    """
+    Read the fields we use from an appmanifest file.
+
+    Args:
+        path (str): Path to an appmanifest_*.acf file.
+
+    Returns:
+        dict: The AppState fields listed in APPMANIFEST_FIELDS.
+    """
+    return load_selected(path, APPMANIFEST_FIELDS)['AppState']
 
 def get_localconfig_last_playtime(games, localconfig_path):
     """
-    Retrieve the last played time for a game from localconfig.vdf.
+    Update the 'last_played' and 'play_time' fields of games from localconfig.vdf.
+
+    Each game is looked up by appid in the apps read from the file, so the cost
+    is linear in the number of games.
 
     Args:
-        steam_path (str): The root path of the Steam installation.
-        appid (int): The application ID of the game.
+        games (list): List of game dictionaries.
+        localconfig_path (str): Path to the user's localconfig.vdf.
+    """
+    apply_localconfig_playtimes(games, read_localconfig_playtimes(localconfig_path))
+
+def read_localconfig_playtimes(localconfig_path):
+    """
+    Read the per-app LastPlayed and Playtime entries of localconfig.vdf.
+
+    Args:
+        localconfig_path (str): Path to the user's localconfig.vdf.
 
     Returns:
-        int: Last played timestamp in seconds since epoch.
+        dict: Map from appid string to a dict with the 'LastPlayed'/'Playtime' found.
     """
-    with open(localconfig_path, encoding='utf-8') as f:
-        data = vdf.load(f)
+    data = load_selected(localconfig_path, LOCALCONFIG_FIELDS)
+    return data['UserLocalConfigStore']['Software']['Valve']['Steam']['apps']
 
-    data.get('UserLocalConfigStore', {}).get('Software', {}).get('Valve', {}).get('Steam', {}).get('apps', {})
-    for appid, appdata in data['UserLocalConfigStore']['Software']['Valve']['Steam']['apps'].items():
-        for game in games:
-            if str(game['appid']) == appid:
+def apply_localconfig_playtimes(games, apps):
+    """
+    Update the 'last_played' and 'play_time' fields of games from read_localconfig_playtimes.
 
-                last_played = appdata.get('LastPlayed', 0)
-                if isinstance(last_played, str):
-                    game["last_played"] = int(last_played)
-                else:
-                    game["last_played"] = last_played
+    Args:
+        games (list): List of game dictionaries.
+        apps (dict): Map returned by read_localconfig_playtimes.
+    """
+    for game in games:
+        appdata = apps.get(str(game['appid']))
+        if appdata is None:
+            continue
+
+        last_played = appdata.get('LastPlayed', 0)
+        if isinstance(last_played, str):
+            game["last_played"] = int(last_played)
+        else:
+            game["last_played"] = last_played
 
-                play_time = appdata.get('Playtime', 0)
-                if isinstance(play_time, str):
-                    game["play_time"] = int(play_time)
\ No newline at end of file
+        play_time = appdata.get('Playtime', 0)
+        if isinstance(play_time, str):
+            game["play_time"] = int(play_time)
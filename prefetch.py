@@ -0,0 +1,120 @@
+"""
+prefetch.py
+
+Background rendering of icon art for the games around the cursor.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from art_cache import ArtCache, fit_to_terminal
+
+class ArtPrefetcher:
+    """
+    Render icon art on a thread pool ahead of the UI.
+
+    The UI asks for art with lookup(), which never blocks: it returns the art if
+    it is cached, or None after queueing a render. request() replaces the set of
+    wanted icons, cancelling queued renders that are no longer near the cursor.
+    on_ready(key) is called from a worker thread whenever a render finishes.
+    """
+
+    def __init__(self, art_cache: ArtCache, workers: int = 2, on_ready=None):
+        self.art_cache = art_cache
+        self.on_ready = on_ready
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="art-prefetch")
+        self._pending = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, image_path: str, width: int, height: int) -> tuple[str | None, int, int]:
+        """
+        Compute the cache key and the effective size of an icon.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Requested art width.
+            height (int): Requested art height.
+
+        Returns:
+            tuple: (key or None if the icon is missing, width, height).
+        """
+        width, height = fit_to_terminal(width, height)
+        return self.art_cache.key(image_path, width, height), width, height
+
+    def lookup(self, image_path: str, width: int, height: int):
+        """
+        Return the art for an icon if it is cached, otherwise schedule its render.
+
+        Args:
+            image_path (str): Path to the image file.
+            width (int): Requested art width.
+            height (int): Requested art height.
+
+        Returns:
+            rich.text.Text | None: The art, or None while it is being rendered.
+
+        Raises:
+            FileNotFoundError: If the icon does not exist.
+            ValueError: If rendering the icon failed.
+        """
+        key, width, height = self.resolve(image_path, width, height)
+        if key is None:
+            raise FileNotFoundError(f"Icon not found: {image_path}")
+        if key in self._failed:
+            raise ValueError(f"Cannot render icon: {image_path}")
+        text = self.art_cache.get_by_key(key)
+        if text is None:
+            self._submit(key, image_path, width, height)
+        return text
+
+    def request(self, items: list[tuple[str, int, int]]):
+        """
+        Replace the set of icons to render ahead of time.
+
+        Args:
+            items (list[tuple[str, int, int]]): (image_path, width, height) in priority order.
+        """
+        wanted = []
+        for image_path, width, height in items:
+            key, width, height = self.resolve(image_path, width, height)
+            if key is None or key in self._failed or self.art_cache.in_memory(key):
+                continue
+            wanted.append((key, image_path, width, height))
+
+        wanted_keys = {item[0] for item in wanted}
+        with self._lock:
+            stale = [(k, f) for k, f in self._pending.items() if k not in wanted_keys]
+        for key, future in stale:
+            future.cancel()
+
+        for key, image_path, width, height in wanted:
+            self._submit(key, image_path, width, height)
+
+    def _submit(self, key: str, image_path: str, width: int, height: int):
+        with self._lock:
+            if key in self._pending:
+                return
+            future = self._executor.submit(self._render, key, image_path, width, height)
+            self._pending[key] = future
+        future.add_done_callback(lambda f, key=key: self._done(key, f))
+
+    def _render(self, key: str, image_path: str, width: int, height: int):
+        if self.art_cache.get_by_key(key) is None:
+            self.art_cache.put_by_key(key, self.art_cache.render(image_path, width, height))
+
+    def _done(self, key: str, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self._failed.add(key)
+        if self.on_ready is not None:
+            self.on_ready(key)
+
+    def shutdown(self):
+        """
+        Cancel queued renders and stop the worker threads.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
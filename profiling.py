@@ -0,0 +1,183 @@
+"""
+profiling.py
+
+Opt-in timers for the main paths of the TUI (library scan, list updates, art
+conversion, rendering), enabled by steam_tui_rich.py --profile.
+"""
+
+import os
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Durations kept per stage for the last/p95 figures of the overlay
+RECENT_SAMPLES = 200
+
+enabled = False
+_profiler = None
+_lock = threading.Lock()
+_durations = {}  # stage -> list of durations in seconds
+_recent = {}  # stage -> deque of the latest durations
+_null = nullcontext()
+
+def enable(cprofile: bool = False, trace_memory: bool = False):
+    """
+    Start recording. Until then the timers cost a flag check.
+
+    Args:
+        cprofile (bool): Also run cProfile, on the calling thread only.
+        trace_memory (bool): Also trace allocations with tracemalloc.
+    """
+    global enabled, _profiler
+    enabled = True
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if cprofile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def record(stage: str, seconds: float):
+    """
+    Record one duration of a stage.
+
+    Args:
+        stage (str): Stage name.
+        seconds (float): Duration.
+    """
+    with _lock:
+        durations = _durations.get(stage)
+        if durations is None:
+            durations = _durations[stage] = []
+            _recent[stage] = deque(maxlen=RECENT_SAMPLES)
+        durations.append(seconds)
+        _recent[stage].append(seconds)
+
+@contextmanager
+def _timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def stage(name: str):
+    """
+    Time a block: `with stage("scan.compose"): ...`.
+
+    Args:
+        name (str): Stage name.
+
+    Returns:
+        A context manager, doing nothing when profiling is off.
+    """
+    return _timer(name) if enabled else _null
+
+def profiled(name: str):
+    """
+    Decorator timing every call of a function as a stage. Whether profiling
+    is on is checked at call time, so it can decorate functions defined before
+    enable() is called.
+
+    Args:
+        name (str): Stage name.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def percentile(values, fraction: float) -> float:
+    """
+    Args:
+        values (Iterable[float]): Samples.
+        fraction (float): Between 0 and 1, e.g. 0.95.
+
+    Returns:
+        float: The nearest-rank percentile, 0.0 without samples.
+    """
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, int(len(values) * fraction + 0.5) - 1))]
+
+def recent(stage: str) -> tuple[float, float] | None:
+    """
+    Args:
+        stage (str): Stage name.
+
+    Returns:
+        tuple[float, float] | None: Last duration and p95 of the recent ones, None before the first.
+    """
+    with _lock:
+        samples = list(_recent.get(stage, ()))
+    if not samples:
+        return None
+    return samples[-1], percentile(samples, 0.95)
+
+def report() -> str:
+    """
+    Returns:
+        str: A table of every stage: calls, total, mean, p50, p95 and max, in ms.
+    """
+    with _lock:
+        stages = {name: list(durations) for name, durations in _durations.items()}
+    lines = [f"{'stage':28} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for name in sorted(stages, key=lambda name: -sum(stages[name])):
+        durations = stages[name]
+        total = sum(durations)
+        lines.append(f"{name:28} {len(durations):>7} {total * 1000:>10.1f} {total / len(durations) * 1000:>9.2f} "
+                     f"{percentile(durations, 0.5) * 1000:>9.2f} {percentile(durations, 0.95) * 1000:>9.2f} "
+                     f"{max(durations) * 1000:>9.2f}")
+    return "\n".join(lines)
+
+def write_report(directory: str) -> list[str]:
+    """
+    Write the stage table, and the cProfile and tracemalloc results if they
+    were enabled, to a directory.
+
+    Args:
+        directory (str): Output directory, created if missing.
+
+    Returns:
+        list[str]: Paths of the files written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    path = os.path.join(directory, "stages.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report() + "\n")
+    written.append(path)
+
+    if _profiler is not None:
+        import pstats
+        _profiler.disable()
+        path = os.path.join(directory, "cprofile.pstats")
+        _profiler.dump_stats(path)
+        written.append(path)
+        path = os.path.join(directory, "cprofile.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            pstats.Stats(_profiler, stream=f).sort_stats("cumulative").print_stats(60)
+        written.append(path)
+
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:40]
+        path = os.path.join(directory, "tracemalloc.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"current {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB\n\n")
+            f.writelines(f"{stat}\n" for stat in top)
+        written.append(path)
+    return written
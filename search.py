@@ -0,0 +1,335 @@
+"""
+search.py
+
+Search index over the game names, for filtering the library as the user types.
+"""
+
+import unicodedata
+import numpy as np
+from collections import OrderedDict
+
+# Grams up to this length have postings; shorter queries are answered from them alone
+GRAM_SIZE = 3
+# Grams up to this length are indexed when the index is built, longer ones on first use
+EAGER_GRAM_SIZE = 2
+CACHED_QUERIES = 64
+# Names up to this length are scored by fuzzy_search on numpy arrays, longer ones one by one
+FUZZY_WIDTH = 64
+# Bits per character in the packed gram keys (Unicode code points fit in 21 bits)
+CODE_BITS = 21
+
+def normalize(text: str) -> str:
+    """
+    Fold case and strip accents, so that "Pokémon" matches "pokemon".
+
+    Args:
+        text (str): Text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def fuzzy_score(query: str, name: str) -> int | None:
+    """
+    Score a name against a query whose characters must appear in order.
+
+    Consecutive matches and matches at the start of a word score higher, so
+    "hk" ranks "Hollow Knight" above "Shank".
+
+    Args:
+        query (str): Normalized query.
+        name (str): Normalized name.
+
+    Returns:
+        int | None: The score, or None if the name does not match.
+    """
+    score = 0
+    pos = 0
+    previous = -2
+    for c in query:
+        pos = name.find(c, pos)
+        if pos < 0:
+            return None
+        if pos == previous + 1:
+            score += 5
+        if pos == 0 or not name[pos - 1].isalnum():
+            score += 8
+        score -= min(pos - previous - 1, 3)
+        previous = pos
+        pos += 1
+    return score
+
+def gram_key(gram: str) -> int:
+    """
+    Args:
+        gram (str): Text of at most EAGER_GRAM_SIZE characters.
+
+    Returns:
+        int: The code points of gram packed into one integer.
+    """
+    key = 0
+    for c in gram:
+        key = (key << CODE_BITS) | ord(c)
+    return key
+
+class SearchIndex:
+    """
+    Substring search over the names of a list of games.
+
+    Names are normalized once when the index is built, together with sorted
+    tables of the grams of up to EAGER_GRAM_SIZE characters they contain,
+    built with numpy in a few passes over all the names. Postings of longer
+    grams, up to GRAM_SIZE characters, are derived from the shorter of the
+    postings of their prefix and suffix the first time they are needed. Every
+    posting is kept once computed, so a short query is a lookup. A longer
+    query only checks the names in the result of its longest cached prefix,
+    or in the posting of its rarest gram. Results of recent queries are kept,
+    so extending a query filters the previous result and deleting a character
+    finds the earlier one again. Postings and results are numpy arrays, which
+    the caller can use as indexes without converting them.
+    """
+
+    def __init__(self, games: list[dict]):
+        self.games = games
+        self.names = [normalize(game["name"]) for game in games]
+        self.postings = {}
+        # Names joined by NUL, which normalize never produces, one code point per element
+        codes = np.frombuffer("\0".join(self.names).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        lengths = np.fromiter(map(len, self.names), dtype=np.int64, count=len(self.names))
+        owners = np.repeat(np.arange(len(self.names)), lengths + 1)[:len(codes)]
+        self._tables = [self._gram_table(size, codes, owners) for size in range(1, EAGER_GRAM_SIZE + 1)]
+        self._results = OrderedDict()
+        self._fuzzy_arrays = None
+
+    @staticmethod
+    def _gram_table(size: int, codes: np.ndarray, owners: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Index the grams of a given length.
+
+        Args:
+            size (int): Gram length.
+            codes (np.ndarray): Code points of the NUL-joined names.
+            owners (np.ndarray): Position of the name each code point belongs to.
+
+        Returns:
+            tuple: (sorted gram keys, start of each key's owners plus the end, owners).
+                The owners of a key are the ascending positions of the names containing it.
+        """
+        count = max(0, len(codes) - size + 1)
+        keys = codes[:count].copy()
+        valid = keys != 0
+        for offset in range(1, size):
+            keys = (keys << CODE_BITS) | codes[offset:offset + count]
+            valid &= codes[offset:offset + count] != 0
+        keys = keys[valid]
+        owners = owners[:count][valid]
+
+        # A stable sort keeps the owners of each key ascending
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        owners = owners[order]
+        unique = np.ones(len(keys), dtype=bool)
+        unique[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+        keys = keys[unique]
+        owners = owners[unique]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+        return keys[starts], np.r_[starts, len(keys)], owners
+
+    def posting(self, gram: str) -> np.ndarray:
+        """
+        Args:
+            gram (str): Normalized text of at most GRAM_SIZE characters.
+
+        Returns:
+            np.ndarray: Ascending positions of the names containing gram. Must not be mutated.
+        """
+        posting = self.postings.get(gram)
+        if posting is not None:
+            return posting
+        if len(gram) <= EAGER_GRAM_SIZE:
+            keys, bounds, owners = self._tables[len(gram) - 1]
+            key = gram_key(gram)
+            i = int(np.searchsorted(keys, key))
+            if i < len(keys) and keys[i] == key:
+                posting = owners[bounds[i]:bounds[i + 1]]
+            else:
+                posting = owners[:0]
+        else:
+            candidates = min(self.posting(gram[:-1]), self.posting(gram[1:]), key=len)
+            posting = self._containing(gram, candidates)
+        self.postings[gram] = posting
+        return posting
+
+    def _containing(self, text: str, candidates: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The candidates whose name contains text.
+        """
+        names = self.names
+        return candidates[np.fromiter((text in names[i] for i in candidates.tolist()), dtype=bool, count=len(candidates))]
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Find the games whose name contains the query, ignoring case and accents.
+
+        Args:
+            query (str): Search string.
+
+        Returns:
+            np.ndarray: Positions in games of the matches, ascending. Must not be mutated.
+        """
+        query = normalize(query)
+        if query == "":
+            return np.arange(len(self.games))
+        if len(query) <= GRAM_SIZE:
+            return self.posting(query)
+        result = self._results.get(query)
+        if result is not None:
+            self._results.move_to_end(query)
+            return result
+
+        candidates = self._narrowest(query)
+        if candidates is None:
+            candidates = min((self.posting(query[i:i + GRAM_SIZE]) for i in range(0, len(query) - GRAM_SIZE + 1, GRAM_SIZE)), key=len)
+        result = self._containing(query, candidates)
+
+        self._results[query] = result
+        while len(self._results) > CACHED_QUERIES:
+            self._results.popitem(last=False)
+        return result
+
+    def _narrowest(self, query: str) -> np.ndarray | None:
+        """
+        Returns:
+            np.ndarray | None: The cached result of the longest prefix of query, if any.
+        """
+        for end in range(len(query) - 1, GRAM_SIZE - 1, -1):
+            result = self._results.get(query[:end])
+            if result is not None:
+                return result
+        return None
+
+    def _fuzzy_tables(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Build, on the first fuzzy search, the arrays fuzzy_search scores names on.
+
+        Characters are numbered from 1 in code point order, 0 being the
+        padding, so the table of names fits in 16 bits per character.
+
+        Returns:
+            tuple: (number of each code point, 0 for those not in any name;
+                the numbered characters of each name, padded up to the longest
+                name or FUZZY_WIDTH; whether each character starts a word;
+                whether each name is too long for the table).
+        """
+        if self._fuzzy_arrays is not None:
+            return self._fuzzy_arrays
+        names = self.names
+        codes = np.frombuffer("\0".join(names).encode("utf-32-le"), dtype=np.uint32)
+        lengths = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+        long = lengths > FUZZY_WIDTH
+        width = max(1, int(lengths[~long].max(initial=0)))
+
+        alphabet = np.flatnonzero(np.bincount(codes))
+        alphabet = alphabet[alphabet != 0]
+        numbers = np.zeros(int(alphabet[-1]) + 1 if len(alphabet) else 1, dtype=np.uint16 if len(alphabet) < 0xFFFF else np.int32)
+        numbers[alphabet] = np.arange(1, len(alphabet) + 1)
+
+        keep = codes != 0
+        if long.any():
+            keep &= ~np.repeat(long, lengths + 1)[:len(codes)]
+        table = np.zeros((len(names), width), dtype=numbers.dtype)
+        # Row-major order of the cells is the order of the characters in the joined names
+        table[np.arange(width) < np.where(long, 0, lengths)[:, None]] = numbers[codes[keep]]
+
+        # Padding counts as not alphanumeric
+        alnum = np.r_[False, np.fromiter((chr(code).isalnum() for code in alphabet.tolist()), dtype=bool, count=len(alphabet))]
+        word_start = np.ones(table.shape, dtype=bool)
+        word_start[:, 1:] = ~alnum[table[:, :-1]]
+        self._fuzzy_arrays = (numbers, table, word_start, long)
+        return self._fuzzy_arrays
+
+    def fuzzy_search(self, query: str) -> np.ndarray:
+        """
+        Find the games whose name contains the characters of the query in order,
+        best matches first.
+
+        Names are scored like fuzzy_score, all at once on numpy arrays: one
+        pass over the candidates per query character. The characters are
+        matched left to right, so a query extending one searched recently
+        resumes from where that one stopped, on its matches only. Otherwise
+        the candidates are the names containing every character of the query.
+
+        Args:
+            query (str): Search string.
+
+        Returns:
+            np.ndarray: Positions in games of the matches, by decreasing score and then ascending.
+        """
+        query = normalize(query)
+        if query == "":
+            return np.arange(len(self.games))
+        cached = self._results.get(("fuzzy", query))
+        if cached is not None:
+            self._results.move_to_end(("fuzzy", query))
+            return cached[0]
+
+        numbers, table, word_start, long = self._fuzzy_tables()
+        done = 0
+        for end in range(len(query) - 1, 0, -1):
+            cached = self._results.get(("fuzzy", query[:end]))
+            if cached is not None:
+                done = end
+                rows, score, previous, slow = cached[1]
+                break
+        else:
+            postings = sorted((self.posting(c) for c in set(query)), key=len)
+            candidates = postings[0]
+            for posting in postings[1:]:
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            rows = candidates[~long[candidates]]
+            slow = candidates[long[candidates]]
+            score = np.zeros(len(rows), dtype=np.int64)
+            previous = np.full(len(rows), -2, dtype=np.int64)
+
+        columns = np.arange(table.shape[1], dtype=np.int16)
+        for c in query[done:]:
+            if done:
+                # Resuming: drop the names without c before looking for it
+                contains = np.zeros(len(self.names), dtype=bool)
+                contains[self.posting(c)] = True
+                keep = contains[rows]
+                rows, score, previous = rows[keep], score[keep], previous[keep]
+            if len(rows) == 0:
+                break
+            # Every name left contains c, so it has a number
+            hits = table[rows] == numbers[ord(c)]
+            if previous[0] >= 0:  # all -2 before the first character
+                hits &= columns >= (previous + 1).astype(np.int16)[:, None]
+            pos = hits.argmax(axis=1)
+            found = hits[np.arange(len(pos)), pos]
+            if not found.all():
+                rows, score, previous, pos = rows[found], score[found], previous[found], pos[found]
+            score = score + 5 * (pos == previous + 1) + 8 * word_start[rows, pos] - np.minimum(pos - previous - 1, 3)
+            previous = pos
+
+        # Names too long for the table, one by one
+        names = self.names
+        slow_scores = [fuzzy_score(query, names[i]) for i in slow.tolist()]
+        slow = slow[np.fromiter((slow_score is not None for slow_score in slow_scores), dtype=bool, count=len(slow))]
+        if len(slow):
+            all_rows = np.concatenate([rows, slow])
+            all_scores = np.concatenate([score, np.array([slow_score for slow_score in slow_scores if slow_score is not None], dtype=np.int64)])
+            result = all_rows[np.lexsort((all_rows, -all_scores))]
+        else:
+            # Rows are ascending: a stable sort by score keeps ties in position order
+            result = rows[np.argsort(-score, kind="stable")]
+
+        self._results[("fuzzy", query)] = (result, (rows, score, previous, slow))
+        while len(self._results) > CACHED_QUERIES:
+            self._results.popitem(last=False)
+        return result
@@ -4,70 +4,565 @@ steam_tui.py
 Provides functions to retrieve and aggregate games from Steam libraries and user shortcuts.
 """
 
-from parser import get_shortcuts, get_steam_libraries, get_installed_games, get_shortcut_last_playtime, get_localconfig_last_playtime
-from icon_search import find_and_classify_steam_images
+from parser import (get_shortcuts, get_steam_libraries, list_appmanifests, read_appmanifest, read_gameprocess_log,
+                    apply_gameprocess_playtimes, read_localconfig_playtimes, apply_localconfig_playtimes)
+from icon_search import build_librarycache_index, find_and_classify_steam_images
+from library_snapshot import get_snapshot
+from profiling import profiled, stage
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
+import sys
+import csv
+import json
 
-def get_games(steam_id, steam_path):
+DEFAULT_SCAN_WORKERS = 8
+# Fields of the games, as written by export_games
+EXPORT_FIELDS = ("appid", "name", "exe", "icon", "category", "last_played", "play_time", "size_on_disk", "id")
+
+def shortcut_field(shortcut, key, default=None):
+    """
+    Read a field of a shortcut ignoring case, since Steam has written both
+    'appname' and 'AppName' over time.
+
+    Args:
+        shortcut (dict): Shortcut as returned by get_shortcuts.
+        key (str): Field name.
+        default: Value returned when the field is missing.
+
+    Returns:
+        The field value, or default.
+    """
+    if key in shortcut:
+        return shortcut[key]
+    key = key.lower()
+    for k, v in shortcut.items():
+        if k.lower() == key:
+            return v
+    return default
+
+def shortcut_id(appid):
+    """
+    Args:
+        appid (int): appid of a non-Steam shortcut, as stored in shortcuts.vdf.
+
+    Returns:
+        int: The 64-bit game id Steam launches the shortcut with.
+    """
+    return (appid << 32) | 0x02000000
+
+def shortcut_exe(id):
+    """
+    Args:
+        id (int): Game id returned by shortcut_id.
+
+    Returns:
+        str: Command starting the shortcut through Steam.
+    """
+    return f"start steam://rungameid/{id}"
+
+def steam_exe(appid):
+    """
+    Args:
+        appid (int | str): Steam appid.
+
+    Returns:
+        str: Command starting the game through Steam.
+    """
+    return f"start steam://run/{appid}"
+
+def shortcut_game(shortcut):
+    """
+    Build the game dictionary of a non-Steam shortcut.
+
+    Args:
+        shortcut (dict): Shortcut as returned by get_shortcuts.
+
+    Returns:
+        dict: The game.
+    """
+    id = shortcut_id(shortcut["appid"])
+    tags = shortcut_field(shortcut, "tags", {})
+    return {
+        "appid": shortcut["appid"],
+        "name": shortcut_field(shortcut, "appname", ""),
+        "exe": shortcut_exe(id),
+        "icon": shortcut_field(shortcut, "icon", ""),
+        "category": tags.get("0", "Non-Steam") if isinstance(tags, dict) else "Non-Steam",
+        "last_played": 0,
+        "play_time": 0,
+        "id": id,
+    }
+
+def manifest_game(steam_game):
+    """
+    Build a game from the fields of a parsed appmanifest.
+
+    Args:
+        steam_game (dict): Result of read_appmanifest.
+
+    Returns:
+        dict: The game, without its icon.
+    """
+    # Get steam game
+    return {
+        "appid": steam_game["appid"],
+        "name": steam_game["name"],
+        "exe": steam_exe(steam_game["appid"]),
+        "icon": None,
+        "category": "Steam",
+        "last_played": int((steam_game["LastPlayed"])),
+        "play_time": 0,
+        "size_on_disk": steam_game["SizeOnDisk"]
+    }
+
+def scan_manifest(manifest, snapshot):
+    """
+    Parse one appmanifest into a game.
+
+    Args:
+        manifest (str): Path to the appmanifest_*.acf file.
+        snapshot (LibrarySnapshot): Snapshot memoizing the parse results.
+
+    Returns:
+        dict | None: The game, without its icon, or None if the manifest disappeared.
+    """
+    try:
+        steam_game = snapshot.parse("manifest", manifest, read_appmanifest)
+    except OSError:
+        return None  # removed since the directory was listed
+    return manifest_game(steam_game)
+
+def scan_manifests(manifests, snapshot):
+    """
+    Parse a batch of appmanifests, see scan_manifest.
+
+    Args:
+        manifests (list): Paths to appmanifest_*.acf files.
+        snapshot (LibrarySnapshot): Snapshot memoizing the parse results.
+
+    Returns:
+        list[dict]: The games, in the order of the manifests.
+    """
+    games = []
+    for manifest in manifests:
+        game = scan_manifest(manifest, snapshot)
+        if game is not None:
+            games.append(game)
+    return games
+
+def game_key(game):
+    """
+    Identify a game across rescans.
+
+    Args:
+        game (dict): A game as returned by get_games.
+
+    Returns:
+        tuple: ('shortcut', id) for non-Steam shortcuts, ('steam', appid) otherwise.
+    """
+    if "id" in game:
+        return ("shortcut", game["id"])
+    return ("steam", str(game["appid"]))
+
+def get_input_paths(steam_id, steam_path):
+    """
+    Paths of the Steam files the game list is built from.
+
+    Args:
+        steam_id (str): The user's Steam ID.
+        steam_path (str): The root path of the Steam installation.
+
+    Returns:
+        dict: Paths keyed by 'shortcuts', 'gameprocess', 'localconfig', 'libraryfolders' and 'librarycache'.
+    """
+    return {
+        "shortcuts": os.path.join(steam_path, "userdata", steam_id, "config", "shortcuts.vdf"),
+        "gameprocess": os.path.join(steam_path, "logs", "gameprocess_log.txt"),
+        "localconfig": os.path.join(steam_path, "userdata", steam_id, "config", "localconfig.vdf"),
+        "libraryfolders": os.path.join(steam_path, "steamapps", "libraryfolders.vdf"),
+        "librarycache": os.path.join(steam_path, "appcache", "librarycache"),
+    }
+
+def compose_games(shortcuts, gameprocess_index, library_games, images_index, apps):
+    """
+    Assemble the game list from the parsed Steam files.
+
+    Args:
+        shortcuts (list): Shortcuts as returned by get_shortcuts.
+        gameprocess_index (dict): Index returned by read_gameprocess_log.
+        library_games (list[list[dict]]): Games of each library, as returned by scan_manifests.
+        images_index (dict): Index returned by build_librarycache_index.
+        apps (dict): Map returned by read_localconfig_playtimes.
+
+    Returns:
+        list[dict]: The games.
+    """
+    # Get user shortcuts
+    games = [shortcut_game(shortcut) for shortcut in shortcuts]
+    # Update last played time for shortcuts
+    apply_gameprocess_playtimes(games, gameprocess_index)
+
+    for library in library_games:
+        for game in library:
+            images = images_index.get(str(game["appid"]))
+            if images is not None:
+                game["icon"] = images["images"]["icon"]
+            games.append(game)
+
+    apply_localconfig_playtimes(games, apps)
+    return games
+
+def scan_games(steam_id, steam_path, cache_dir=None, workers=DEFAULT_SCAN_WORKERS):
+    """
+    Scan the Steam libraries and user shortcuts like get_games, yielding the
+    games in batches as soon as each one is complete: the shortcuts, then one
+    batch per library, in the order the libraries finish. A batch is not
+    touched again once yielded. The snapshot is saved when the generator is
+    exhausted; stopping early leaves it as it was.
+
+    Args:
+        steam_id (str): The user's Steam ID.
+        steam_path (str): The root path of the Steam installation.
+        cache_dir (str, optional): Directory holding the snapshot, defaults to cache_paths.get_cache_dir().
+        workers (int): Total number of scanning threads: one reads the user
+            files, the others are split between the libraries.
+
+    Yields:
+        tuple[int, int, list[dict]]: Position of the batch in the get_games result
+            (0 for the shortcuts, then each library in libraryfolders.vdf order),
+            number of batches, and the games of the batch.
+    """
+    snapshot = get_snapshot(cache_dir)
+    snapshot.begin_scan()
+    paths = get_input_paths(steam_id, steam_path)
+
+    with stage("scan.libraryfolders"):
+        libraries = snapshot.parse("libraryfolders", paths["libraryfolders"], lambda path: get_steam_libraries(steam_path))
+    # One thread for the user files, the others in up to one group per library;
+    # with more libraries than groups, libraries take turns on the groups
+    workers = max(1, workers)
+    group_count = max(1, min(len(libraries), workers - 1))
+    per_group = max(1, (workers - 1) // group_count)
+    groups = [ThreadPoolExecutor(max_workers=per_group, thread_name_prefix=f"scan-lib{i}") for i in range(group_count)]
+    user_pool = groups[0] if workers == 1 else ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-user")
+    library_pools = [groups[i % group_count] for i in range(len(libraries))]
+    try:
+        # User files
+        shortcuts_future = user_pool.submit(profiled("scan.shortcuts")(snapshot.parse), "shortcuts", paths["shortcuts"], get_shortcuts)
+        gameprocess_future = user_pool.submit(profiled("scan.gameprocess")(snapshot.parse_appending), "gameprocess", paths["gameprocess"], read_gameprocess_log)
+        localconfig_future = user_pool.submit(profiled("scan.localconfig")(snapshot.parse), "localconfig", paths["localconfig"], read_localconfig_playtimes)
+        images_future = user_pool.submit(profiled("scan.librarycache")(snapshot.update), "librarycache", paths["librarycache"], lambda path, previous: build_librarycache_index(steam_path, previous))
+
+        # List every library at once, then parse its manifests in its own group
+        listings = [
+            pool.submit(profiled("scan.listing")(snapshot.parse), "manifests", os.path.join(lib, "steamapps"), lambda path, lib=lib: list_appmanifests(lib))
+            for pool, lib in zip(library_pools, libraries)
+        ]
+        library_results = []
+        for pool, listing in zip(library_pools, listings):
+            manifests = listing.result()
+            chunk = max(1, -(-len(manifests) // per_group))
+            library_results.append([
+                pool.submit(profiled("scan.manifests")(scan_manifests), manifests[i:i + chunk], snapshot)
+                for i in range(0, len(manifests), chunk)
+            ])
+
+        # What each batch waits for: the shortcuts first, the libraries as they finish
+        needs = [[shortcuts_future, gameprocess_future, localconfig_future]]
+        needs += [[*results, images_future, localconfig_future] for results in library_results]
+        ready = [False] * len(needs)
+        for future in as_completed({future for futures in needs for future in futures}):
+            for i, futures in enumerate(needs):
+                if ready[i] or not all(f.done() for f in futures):
+                    continue
+                ready[i] = True
+                with stage("scan.compose"):
+                    if i == 0:
+                        games = compose_games(shortcuts_future.result(), gameprocess_future.result(), [], {}, localconfig_future.result())
+                    else:
+                        library = [game for result in library_results[i - 1] for game in result.result()]
+                        games = compose_games([], {}, [library], images_future.result(), localconfig_future.result())
+                yield i, len(needs), games
+    finally:
+        for pool in {user_pool, *groups}:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    with stage("scan.save"):
+        snapshot.end_scan()
+
+@profiled("get_games")
+def get_games(steam_id, steam_path, cache_dir=None, workers=DEFAULT_SCAN_WORKERS, on_library=None):
     """
     Retrieve all games from Steam libraries and user shortcuts.
 
+    Parse results are kept in a persisted snapshot (see library_snapshot.py)
+    keyed by each input file's mtime and size, so a rescan only re-parses the
+    files that changed, picks up added or removed appmanifests, and reads only
+    the new lines of gameprocess_log.txt.
+
+    Images are classified once for the whole librarycache (see
+    icon_search.build_librarycache_index); games without images are kept,
+    with no icon.
+
+    Libraries are scanned concurrently, each by its own group of threads (as
+    long as there are threads enough) so a slow disk does not hold up the
+    others, while the user files (shortcuts, gameprocess log) are read by a
+    further thread (see scan_games). No more than `workers` threads are used. The result
+    order does not depend on scheduling: shortcuts first, then each library in
+    libraryfolders.vdf order, each sorted by appmanifest name.
+
     Args:
         steam_id (str): The user's Steam ID.
         steam_path (str): The root path of the Steam installation.
+        cache_dir (str, optional): Directory holding the snapshot, defaults to cache_paths.get_cache_dir().
+        workers (int): Total number of scanning threads, split between the libraries.
+        on_library (callable, optional): Called from the calling thread each time a library
+            finishes, except the last, with the games found so far (in the final order,
+            missing the libraries still being scanned).
 
     Returns:
         list[dict]: A list of dictionaries, each representing a game with keys such as
             'appid', 'name', 'exe', 'icon', 'category', 'last_played', and optionally 'size_on_disk' and 'path'.
     """
-    games = []
+    batches = []
+    for i, count, games in scan_games(steam_id, steam_path, cache_dir, workers):
+        if not batches:
+            batches = [None] * count
+        batches[i] = games
+        if on_library is not None and i > 0 and count > 2 and any(batch is None for batch in batches[1:]):
+            on_library([game for batch in batches if batch is not None for game in batch])
+    return [game for batch in batches for game in batch]
 
-    # Get user shortcuts
-    shortcut_path = os.path.join(steam_path, "userdata", steam_id, "config", "shortcuts.vdf")
-    shortcuts = get_shortcuts(shortcut_path)
-    for shortcut in shortcuts:
-        id = (shortcut["appid"] << 32) | 0x02000000
-        game = {
-            "appid": shortcut["appid"],
-            "name": shortcut["appname"],
-            "exe": f"start steam://rungameid/{id}",
-            "icon": shortcut["icon"],
-            "category": shortcut["0"],
-            "last_played": 0,
-            "play_time": 0,
-            "id": id,
-        }
-        games.append(game)
-    
-    # Update last played time for shortcuts
-    gameprocess_log_path = os.path.join(steam_path, "logs", "gameprocess_log.txt")
-    get_shortcut_last_playtime(games, gameprocess_log_path)
+def get_cached_games(steam_id, steam_path, cache_dir=None):
+    """
+    Rebuild the game list of the last scan from the snapshot alone, without
+    reading or even stat'ing the Steam files, so the UI has something to show
+    while get_games runs.
+
+    Args:
+        steam_id (str): The user's Steam ID.
+        steam_path (str): The root path of the Steam installation.
+        cache_dir (str, optional): Directory holding the snapshot.
+
+    Returns:
+        list[dict] | None: The games as the last scan found them, or None if the snapshot holds no scan.
+    """
+    snapshot = get_snapshot(cache_dir)
+    paths = get_input_paths(steam_id, steam_path)
+    libraries = snapshot.cached("libraryfolders", paths["libraryfolders"])
+    images_index = snapshot.cached("librarycache", paths["librarycache"])
+    if libraries is None or images_index is None:
+        return None
+
+    # Missing user files are not stored in the snapshot
+    shortcuts = snapshot.cached("shortcuts", paths["shortcuts"]) or []
+    gameprocess = snapshot.cached("gameprocess", paths["gameprocess"])
+    apps = snapshot.cached("localconfig", paths["localconfig"]) or {}
 
-    libraries = get_steam_libraries(steam_path)
+    library_games = []
     for lib in libraries:
-        steam_games = get_installed_games(lib)
-
-        for steam_game in steam_games:
-            try:
-                imgs = find_and_classify_steam_images(steam_path, steam_game["appid"])
-            except Exception as e:
-                print(f"icon not found for {steam_game['name']} - {steam_game['appid']}")
-                # print(e)
+        games = []
+        for manifest in snapshot.cached("manifests", os.path.join(lib, "steamapps")) or []:
+            steam_game = snapshot.cached("manifest", manifest)
+            if steam_game is not None:
+                games.append(manifest_game(steam_game))
+        library_games.append(games)
+
+    return compose_games(shortcuts, gameprocess[0] if gameprocess is not None else {}, library_games, images_index, apps)
+
+@profiled("refresh_games")
+def refresh_games(steam_id, steam_path, changed_paths, cache_dir=None, workers=DEFAULT_SCAN_WORKERS):
+    """
+    Rebuild the game list after some input files changed, re-reading only those
+    files and the steamapps listings containing them. Unchanged appmanifests
+    and listings come from the snapshot filled by get_games without touching
+    the disk; the user files cost a stat each.
+
+    Falls back to get_games when libraryfolders.vdf changed or the snapshot
+    does not hold a previous scan.
+
+    Args:
+        steam_id (str): The user's Steam ID.
+        steam_path (str): The root path of the Steam installation.
+        changed_paths (Iterable[str]): Files that were modified, created or removed.
+        cache_dir (str, optional): Directory holding the snapshot.
+        workers (int): Threads for the get_games fallback.
+
+    Returns:
+        list[dict]: The games, as get_games would return them.
+    """
+    snapshot = get_snapshot(cache_dir)
+    paths = get_input_paths(steam_id, steam_path)
+    normalize = lambda path: os.path.normcase(os.path.normpath(path))
+    changed = {normalize(p) for p in changed_paths}
+    is_changed = lambda path: normalize(path) in changed
+
+    libraries = snapshot.cached("libraryfolders", paths["libraryfolders"])
+    images_index = snapshot.cached("librarycache", paths["librarycache"])
+    if libraries is None or images_index is None or is_changed(paths["libraryfolders"]):
+        return get_games(steam_id, steam_path, cache_dir, workers)
+
+    # Small user files: an unchanged one costs a stat
+    shortcuts = snapshot.parse("shortcuts", paths["shortcuts"], get_shortcuts)
+    gameprocess_index = snapshot.parse_appending("gameprocess", paths["gameprocess"], read_gameprocess_log)
+    apps = snapshot.parse("localconfig", paths["localconfig"], read_localconfig_playtimes)
+
+    library_games = []
+    for lib in libraries:
+        steamapps = os.path.join(lib, "steamapps")
+        manifests = snapshot.cached("manifests", steamapps)
+        if manifests is None or any(os.path.dirname(p) == normalize(steamapps) for p in changed):
+            manifests = snapshot.parse("manifests", steamapps, lambda path, lib=lib: list_appmanifests(lib))
+        games = []
+        for manifest in manifests:
+            steam_game = None if is_changed(manifest) else snapshot.cached("manifest", manifest)
+            game = manifest_game(steam_game) if steam_game is not None else scan_manifest(manifest, snapshot)
+            if game is None:
                 continue
-            # Get steam game
-            game = {
-                "appid": steam_game["appid"],
-                "name": steam_game["name"],
-                "exe": f"start steam://run/{steam_game['appid']}",
-                "icon": imgs['icon'],
-                "category": "Steam",
-                "last_played": int((steam_game["LastPlayed"])),
-                "play_time": 0,
-                "size_on_disk": steam_game["SizeOnDisk"]
-            }
+            if str(game["appid"]) not in images_index:
+                # Installed after the librarycache was indexed
+                try:
+                    game["icon"] = find_and_classify_steam_images(steam_path, game["appid"])["icon"]
+                except OSError:
+                    pass
             games.append(game)
+        library_games.append(games)
+
+    games = compose_games(shortcuts, gameprocess_index, library_games, images_index, apps)
+    snapshot.flush()
+    return games
+
+def game_filter(categories=None, name=None, min_play_time=0):
+    """
+    Build a predicate selecting games for export_games.
+
+    Args:
+        categories (Iterable[str], optional): Keep only these categories.
+        name (str, optional): Keep only names containing it, ignoring case and accents.
+        min_play_time (int): Keep only games played at least this many minutes.
+
+    Returns:
+        callable: Takes a game, returns True to keep it.
+    """
+    categories = set(categories) if categories else None
+    if name:
+        # Same matching as the search box; pulls in numpy only when used
+        from search import normalize
+        name = normalize(name)
+    def keep(game):
+        return ((categories is None or game["category"] in categories)
+                and (not name or name in normalize(game["name"]))
+                and game["play_time"] >= min_play_time)
+    return keep
+
+def export_games(steam_id, steam_path, out, format="jsonl", fields=EXPORT_FIELDS, keep=None, ordered=False,
+                 cache_dir=None, workers=DEFAULT_SCAN_WORKERS):
+    """
+    Write the games to a file as JSON lines or CSV, one library at a time as
+    scan_games finishes them, so that the whole list is never held in memory.
+
+    Args:
+        steam_id (str): The user's Steam ID.
+        steam_path (str): The root path of the Steam installation.
+        out (TextIO): Destination.
+        format (str): 'jsonl' or 'csv'.
+        fields (Sequence[str]): Fields to write, see EXPORT_FIELDS. Fields a game
+            does not have are left out in JSON lines and empty in CSV.
+        keep (callable, optional): Predicate selecting the games, e.g. from game_filter.
+        ordered (bool): Write the games in get_games order, holding back the
+            libraries that finish early, instead of in the order they are found.
+        cache_dir (str, optional): Directory holding the snapshot.
+        workers (int): Total number of scanning threads.
+
+    Returns:
+        int: Number of games written.
+    """
+    if format == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda game: out.write(json.dumps({field: game[field] for field in fields if field in game}, ensure_ascii=False) + "\n")
+
+    def write_batch(games):
+        count = 0
+        for game in games:
+            if keep is None or keep(game):
+                write(game)
+                count += 1
+        out.flush()
+        return count
+
+    written = 0
+    held = {}
+    next_batch = 0
+    for i, count, games in scan_games(steam_id, steam_path, cache_dir, workers):
+        if not ordered:
+            written += write_batch(games)
+            continue
+        held[i] = games
+        while next_batch in held:
+            written += write_batch(held.pop(next_batch))
+            next_batch += 1
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    from terminal import parse_size
+
+    arg_parser = argparse.ArgumentParser(prog="python -m steam_tui", description="Steam library without the interface")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the games to standard output or a file, as each library is scanned")
+    export.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="output format (default jsonl)")
+    export.add_argument("--fields", type=lambda value: value.split(","), default=list(EXPORT_FIELDS),
+                        help="comma-separated fields to write (default: " + ",".join(EXPORT_FIELDS) + ")")
+    export.add_argument("--category", action="append", help="keep only this category, may be repeated")
+    export.add_argument("--name", help="keep only names containing this text")
+    export.add_argument("--min-play-time", type=int, default=0, help="keep only games played at least this many minutes")
+    export.add_argument("--ordered", action="store_true", help="write in library order rather than as libraries finish")
+    export.add_argument("--output", "-o", help="output file (default: standard output)")
+    warm = commands.add_parser("warm-cache", help="render the art of every game into the art cache, on every CPU")
+    warm.add_argument("--size", type=parse_size, action="append", metavar="COLUMNSxLINES",
+                      help="terminal size to render for, may be repeated (default: this terminal)")
+    warm.add_argument("--workers", type=int, help="render processes (default: one per CPU)")
+    for command in (export, warm):
+        command.add_argument("--steam-path", help="Steam installation (default: steam_path in config.json)")
+        command.add_argument("--steam-id", help="Steam user ID (default: steam_id in config.json)")
+    args = arg_parser.parse_args()
+
+    if args.command == "export":
+        unknown = [field for field in args.fields if field not in EXPORT_FIELDS]
+        if unknown:
+            arg_parser.error(f"unknown fields: {', '.join(unknown)}")
+    try:
+        with open("config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+    steam_path = args.steam_path or config.get("steam_path")
+    steam_id = args.steam_id or config.get("steam_id")
+    if not steam_path or not steam_id:
+        arg_parser.error("no Steam installation: pass --steam-path and --steam-id or run from the directory of config.json")
 
-    localconfig_path = os.path.join(steam_path, "userdata", steam_id, "config", "localconfig.vdf")
-    get_localconfig_last_playtime(games, localconfig_path)
+    if args.command == "warm-cache":
+        # Imported here: rendering needs Rich and Pillow, which export does without
+        from warm_cache import warm_library
+        sys.exit(warm_library(steam_id, steam_path, config, args.size, args.workers))
 
-    return games
\ No newline at end of file
+    if args.output:
+        out = open(args.output, "w", encoding="utf-8", newline="")
+    else:
+        out = sys.stdout
+        if args.format == "csv":
+            # csv writes its own line endings
+            out.reconfigure(newline="")
+    try:
+        export_games(steam_id, steam_path, out, args.format, args.fields,
+                     game_filter(args.category, args.name, args.min_play_time), args.ordered,
+                     config.get("cache_dir"), config.get("scan_workers", DEFAULT_SCAN_WORKERS))
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`): stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if args.output:
+            out.close()
@@ -1,9 +1,15 @@
+import time
+# Start of the startup timeline printed by --startup-report
+started = time.perf_counter()
 import os
+import sys
 import json
+import argparse
 import subprocess
-import time
+import asyncio
+import threading
+import traceback
 import readchar
-from datetime import datetime
 from rich.console import Console
 from rich.text import Text
 from rich.panel import Panel
@@ -13,57 +19,54 @@ from rich.text import Text
 from rich.live import Live
 from rich.table import Table
 from rich import box
-from steam_tui import get_games
-from imag_proc import image_to_ascii
+from steam_tui import get_games, get_cached_games, refresh_games, game_key, DEFAULT_SCAN_WORKERS
+from game_table import GameTable
+from art_cache import ArtCache, DEFAULT_MAX_MB
+from art_pyramid import PyramidCache, DEFAULT_MAX_MB as DEFAULT_PYRAMID_MB
+from art_styles import DEFAULT_COLOR_MODE
+from prefetch import ArtPrefetcher
+from watcher import LibraryWatcher, DEFAULT_POLL_INTERVAL
 from load_themes import get_themes
-
-def sort_games(games, sort_mode, sort_ascending):
+from library_view import LibraryView, SORT_MODES
+from layout import LEFT_RATIO, RIGHT_RATIO, estimate_entry_height, build_info_text, compute_icon_size
+from virtual_list import VirtualList
+from terminal import get_terminal_size, watch_resize
+from cache_paths import get_cache_dir
+import profiling
+from profiling import profiled, stage, record
+
+# Startup stages and their time since started, in seconds
+startup_times = []
+
+def mark_startup(stage):
     """
-    Sort games based on the given sort mode and order.
+    Record the time a startup stage finished, for --startup-report.
 
     Args:
-        games (list): List of game dictionaries.
-        sort_mode (str): The field to sort by.
-        sort_ascending (bool): Sort order, True for descending.
-
-    Returns:
-        list: Sorted list of games.
-    """
-    sorted_list = sorted(games, key=lambda g: g[sort_mode], reverse=sort_ascending)
-    return sorted_list
-
-def filter_games(games, query):
+        stage (str): Name of the stage.
     """
-    Filter games by a search query on the game name.
-
-    Args:
-        games (list): List of game dictionaries.
-        query (str): Search string.
+    startup_times.append((stage, time.perf_counter() - started))
 
-    Returns:
-        list: Filtered list of games.
-    """
-    if query != "":
-        filter =  [g for g in games if query.lower() in g["name"].lower()]
-    else:
-        filter = games
-    return filter
+mark_startup("imports")
 
-def update_games(games, search_query, sort_mode, sort_ascending):
+@profiled("update_games")
+def update_games(view, search_query, sort_mode, sort_ascending, fuzzy=False):
     """
-    Update the games list by sorting and filtering.
+    Update the games list by filtering and sorting.
 
     Args:
-        games (list): List of game dictionaries.
+        view (LibraryView): View over the games.
         search_query (str): Search string.
         sort_mode (str): Field to sort by.
         sort_ascending (bool): Sort order.
+        fuzzy (bool): Use fuzzy matching.
 
     Returns:
-        list: Filtered and sorted list of games.
+        list: Filtered and sorted list of games, or no_result (loading while the library is being scanned) if nothing matches.
     """
-    sorted_games = sort_games(games, sort_mode, sort_ascending)
-    filtered_games = filter_games(sorted_games, search_query)
+    filtered_games = view.select(search_query, sort_mode, sort_ascending, fuzzy)
+    if filtered_games.__len__() <= 0:
+        return loading if library_loading else no_result
     return filtered_games
 
 def quit_steam():
@@ -74,8 +77,12 @@ def quit_steam():
         config["theme"] = current_palette_index
         config["sort_index"] = sort_index
         config["ascending"] = sort_ascending
+        config["fuzzy_search"] = fuzzy_search
         json.dump(config, f, indent=4)
-    quit()
+    watcher.stop()
+    prefetcher.shutdown()
+    # Not quit(): it closes stdin, which blocks while the reader thread waits for a key
+    sys.exit()
 
 def get_key():
     """
@@ -106,35 +113,58 @@ def get_key():
 
 console = Console(record=True)
 
+arg_parser = argparse.ArgumentParser(description="Steam library TUI")
+arg_parser.add_argument("--clear-cache", action="store_true", help="delete the rendered icon art cache and exit")
+arg_parser.add_argument("--startup-report", action="store_true", help="print the timings of the startup stages on exit")
+arg_parser.add_argument("--profile", action="store_true", help="time the main stages, show frame times and write a report on exit")
+arg_parser.add_argument("--cprofile", action="store_true", help="with --profile, also run cProfile on the UI thread")
+arg_parser.add_argument("--tracemalloc", action="store_true", help="with --profile, also trace memory allocations")
+arg_parser.add_argument("--profile-dir", help="directory of the --profile report (default: 'profile' in the cache directory)")
+args = arg_parser.parse_args()
+if args.profile or args.cprofile or args.tracemalloc:
+    profiling.enable(args.cprofile, args.tracemalloc)
+
 # Read config from config.json
 with open("config.json", "r", encoding="utf-8") as f:
     config = json.load(f)
+
+pyramids = PyramidCache(config.get("cache_dir"), config.get("art_pyramid_mb", DEFAULT_PYRAMID_MB))
+art_cache = ArtCache(config.get("cache_dir"), config.get("art_cache_mb", DEFAULT_MAX_MB), pyramids,
+                     config.get("art_colors", DEFAULT_COLOR_MODE))
+if args.clear_cache:
+    removed = art_cache.clear()
+    console.print(f"Removed {removed} cached icons from {art_cache.cache_dir}")
+    removed = pyramids.clear()
+    console.print(f"Removed {removed} decoded images from {pyramids.cache_dir}")
+    sys.exit(0)
+
 steam_id = config["steam_id"]
 steam_path = config["steam_path"]
 palettes = get_themes()
 
-games = get_games(steam_id, steam_path)
+# Start from the library of the last run, the scan started by main() updates it
+games = GameTable(get_cached_games(steam_id, steam_path, config.get("cache_dir")) or [])
+view = LibraryView(games)
+library_loading = True
+mark_startup("cached library")
 
 # UI state
 selected = 0
-first_visible_game_index = 0
 # Load the current theme
 current_palette_index = config['theme']
 if current_palette_index >= len(palettes) or current_palette_index < 0:
     current_palette_index = 0
 palette_selected = palettes[current_palette_index]
-# Set terminal size limits
-max_height = os.get_terminal_size().lines - 6
-max_width = os.get_terminal_size().columns - 6
 
 # Sort options
 sort_index = config['sort_index']
 sort_ascending = config['ascending']
-sort_modes = ["name", "category", "last_played", "play_time"]
+sort_modes = SORT_MODES
 
 # Search
 search_query = ""
 search_mode = False
+fuzzy_search = config.get("fuzzy_search", False)
 # Fallback for no result in search
 no_result = [
     {
@@ -148,82 +178,339 @@ no_result = [
         "path": "No Result"
     }
 ]
+# Placeholder while the library is being scanned
+loading = [dict(no_result[0], name="Loading library...")]
+
+filtered_games = update_games(view, search_query, sort_modes[sort_index], sort_ascending, fuzzy_search)
+
+SEARCH_SIZE = 3
+
+# Icon art prefetching around the cursor
+prefetch_radius = config.get("prefetch_radius", 5)
+shown_art_key = None
+# Event loop state, set up in main()
+event_loop = None
+render_requested = None
+full_render_pending = False
+background_tasks = set()
+frame_interval = 1 / max(1, config.get("max_fps", 30))
+# Inputs each layout region was last drawn with, see render()
+region_inputs = {}
+# Arrival time of the oldest key not painted yet, for --profile
+unpainted_key_time = None
+# Exception of the last library refresh if it failed, shown in the banner and printed on exit
+refresh_error = None
+
+def prefetch_art():
+    """
+    Ask the prefetcher to render the icons of the games around the cursor,
+    nearest first, plus the top of the list.
+    """
+    if filtered_games is no_result or filtered_games is loading:
+        return
+    n = len(filtered_games)
+    indices = [selected]
+    for offset in range(1, prefetch_radius + 1):
+        indices.append(selected + offset)
+        indices.append(selected - offset)
+    indices.extend(range(prefetch_radius))
+
+    items = []
+    seen = set()
+    for i in indices:
+        if i < 0 or i >= n or i in seen:
+            continue
+        seen.add(i)
+        game = filtered_games[i]
+        if not game["icon"]:
+            continue
+        icon_width, icon_height = compute_icon_size(build_info_text(game, palette_selected), get_terminal_size())
+        items.append((game["icon"], icon_width, icon_height))
+    prefetcher.request(items)
+
+def redraw(live, full=False):
+    """
+    Render the UI and push the regions that changed to the Live display.
 
-filtered_games = update_games(games, search_query, sort_modes[sort_index], sort_ascending)
+    Args:
+        live (Live): The running Live display.
+        full (bool): Rebuild and repaint every region, e.g. after a resize.
+    """
+    global unpainted_key_time
+    start = time.perf_counter()
+    if full:
+        region_inputs.clear()
+    with stage("render"):
+        updated = render()
+    key_time, unpainted_key_time = unpainted_key_time, None
+    if not updated:
+        return
+    with stage("rich_output"):
+        if len(updated) == len(region_inputs):
+            live.refresh()
+        else:
+            # Repaint only the changed regions, in place
+            for name in updated:
+                layout.refresh_screen(live.console, name)
+    if profiling.enabled:
+        end = time.perf_counter()
+        record("frame", end - start)
+        if key_time is not None:
+            record("key_to_paint", end - key_time)
+
+def request_render(full=False):
+    """
+    Ask the render task for a frame. Requests made before it runs are merged
+    into one frame. Must be called from the event loop thread.
 
+    Args:
+        full (bool): Repaint every region.
+    """
+    global full_render_pending
+    full_render_pending = full_render_pending or full
+    render_requested.set()
 
-def compute_visible_games(games_list, selected_game, first_visible_game_index, height, width):
+def call_in_loop(callback, *args):
     """
-    Compute the list of visible games in the UI, scrolling if needed.
+    Schedule a callback on the event loop from another thread. Calls made
+    before the loop starts or after it closes, while quitting, are dropped.
 
     Args:
-        games_list (list): List of games to display.
-        selected (int): Index of the selected game.
-        max_height (int): Maximum number of lines available.
-        width (int): Width for text wrapping.
+        callback (callable): Function to run on the event loop.
+        *args: Its arguments.
+    """
+    if event_loop is None:
+        return
+    try:
+        event_loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        pass  # loop closed
 
-    Returns:
-        list: List of tuples (index, game) for visible games.
+def on_resize():
+    """
+    SIGWINCH callback: the signal handler may interrupt a render, so only
+    schedule a full repaint on the event loop.
+    """
+    call_in_loop(request_render, True)
+
+def on_art_ready(key):
+    """
+    Prefetcher callback, from a worker thread: repaint if the finished art is the one being waited for.
+    """
+    def art_ready():
+        if key == shown_art_key:
+            request_render()
+    call_in_loop(art_ready)
+
+def on_library_change(paths):
+    """
+    Watcher callback, from the watcher thread: re-read the changed Steam files
+    here, then hand the games over to the event loop.
+
+    Args:
+        paths (list[str]): Files that changed.
+    """
+    new_games = refresh_games(steam_id, steam_path, paths, config.get("cache_dir"), config.get("scan_workers", DEFAULT_SCAN_WORKERS))
+    call_in_loop(show_refresh_error, None)
+    call_in_loop(apply_games, new_games)
+
+def show_refresh_error(error):
+    """
+    Show in the banner that the last library refresh failed, or clear it.
+
+    Args:
+        error (Exception | None): What the refresh raised, None once a refresh succeeded.
+    """
+    global refresh_error
+    if error is not refresh_error:
+        refresh_error = error
+        request_render()
+
+def apply_games(new_games):
+    """
+    Push updated games into the UI, keeping the cursor on the same game.
+
+    Args:
+        new_games (list[dict]): The games, as returned by refresh_games.
+    """
+    global games, view, filtered_games, selected
+    new_games = GameTable(new_games)
+    if new_games == games:
+        return
+    current = filtered_games[selected] if filtered_games is not no_result and filtered_games is not loading else None
+    games = new_games
+    view = LibraryView(games)
+    filtered_games = update_games(view, search_query, sort_modes[sort_index], sort_ascending, fuzzy_search)
+    keys = [game_key(game) for game in filtered_games] if current is not None else []
+    selected = keys.index(game_key(current)) if current is not None and game_key(current) in keys else min(selected, len(filtered_games) - 1)
+    request_render()
+
+def launch(command):
+    """
+    Start a game without blocking the UI.
+
+    Args:
+        command (str): Shell command starting the game.
+    """
+    try:
+        subprocess.Popen(command, shell=True)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/] {e}")
+
+def handle_key(key):
     """
-    n = len(games_list)
-    total_height = 0
-    # Start point: try to put selected at the top
-    start_index = first_visible_game_index
+    Apply a key to the UI state. Rendering is left to the render task.
 
-    # Cache for entry heights: {(name, width): height}
-    height_cache = {}
+    Args:
+        key (str): The key, as returned by get_key.
+    """
+    global search_mode, search_query, selected, sort_index, sort_ascending, fuzzy_search
+    global current_palette_index, palette_selected, filtered_games
+    if search_mode:
+        if key == "\r": # Enter: return to normal mode
+            search_mode = False
+        elif key == "\x08": # Backspace: delete char
+            search_query = search_query[:-1]
+            selected = 0
+        elif key.isprintable(): # OTHER: add to search_query
+            search_query += key
+            selected = 0
+    else:
+        if key == "q":  # Q: save config and quit
+            quit_steam()
+        elif key == "/":    # /: search mode
+            search_mode = not search_mode
+        elif key == "\t":   # TAB: sort mode
+            sort_index = (sort_index + 1) % len(sort_modes)
+            selected = 0
+        elif key == "t":    # T: change theme
+            current_palette_index = (current_palette_index + 1) % len(palettes)
+            palette_selected = palettes[current_palette_index]
+        elif key == "r":    # R: reverse order
+            sort_ascending = not sort_ascending
+        elif key == "f":    # F: fuzzy search
+            fuzzy_search = not fuzzy_search
+            selected = 0
+        elif key == "w":    # W: move up
+            selected = (selected - 1) % len(filtered_games)
+        elif key == "s":    # S: move down
+            selected = (selected + 1) % len(filtered_games)
+        elif key == "\r" and filtered_games is not no_result and filtered_games is not loading:   # Enter: start game
+            # Slow work runs off the event loop
+            task = asyncio.create_task(asyncio.to_thread(launch, filtered_games[selected]["exe"]))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+
+    filtered_games = update_games(view, search_query, sort_modes[sort_index], sort_ascending, fuzzy_search)
+
+def read_keys(keys):
+    """
+    Reader thread: block on the keyboard and queue the keys on the event loop.
+    It is a daemon thread, so a pending read does not keep the process alive.
 
+    Args:
+        keys (asyncio.Queue): Queue receiving the keys.
+    """
     while True:
-        total_height = 0
-        visible = []
-
-        for i in range(start_index, n):
-            cache_key = (games_list[i]['name'], width)
-            if cache_key in height_cache:
-                h = height_cache[cache_key]
-            else:
-                h = estimate_entry_height(games_list[i]['name'], width)
-                height_cache[cache_key] = h
-            if total_height + h > height:
-                # If adding this game exceeds the height, stop
-                break
-            visible.append((i, games_list[i]))
-            total_height += h + 1  # +1 for padding between entries
-
-        visible_games_names = [g[1]['name'] for g in visible]
-        if selected_game['name'] not in visible_games_names:
-            # If selected game is not visible, adjust the start index
-            if selected > start_index:
-                # If selected game is below the current start index, scroll down
-               start_index += 1
-            else:
-                # If selected game is above the current start index, scroll up
-                start_index -= 1
-            
-        else:
-            # If selected game is visible, return the visible games
-            break
+        key = get_key()
+        call_in_loop(keys.put_nowait, (key, time.perf_counter()))
 
-    return visible
+async def input_task(keys):
+    """
+    Apply the keys as they arrive. All the keys queued while a frame was
+    being drawn are applied together, so the next frame shows the latest
+    state and the intermediate ones are never drawn.
 
-def estimate_entry_height(entry, width=28):
+    Args:
+        keys (asyncio.Queue): Queue filled by read_keys, with (key, arrival time).
     """
-    Estimate the number of lines needed to display a game entry.
+    global unpainted_key_time
+    while True:
+        key, arrived = await keys.get()
+        if unpainted_key_time is None:
+            unpainted_key_time = arrived
+        handle_key(key)
+        while not keys.empty():
+            handle_key(keys.get_nowait()[0])
+        request_render()
+
+async def render_task(live):
+    """
+    Draw a frame when one is requested, at most once per frame interval.
 
     Args:
-        entry (str): The game name.
-        width (int): The width for wrapping.
+        live (Live): The running Live display.
+    """
+    global full_render_pending
+    while True:
+        await render_requested.wait()
+        render_requested.clear()
+        full, full_render_pending = full_render_pending, False
+        redraw(live, full)
+        prefetch_art()
+        await asyncio.sleep(frame_interval)
+
+async def load_library():
+    """
+    Scan the Steam libraries on a thread and show the result, then start
+    watching the Steam files for changes. Without a library from the last run
+    to show meanwhile, each library is shown as soon as it is read.
+    """
+    global library_loading, filtered_games
+    result = event_loop.create_future()
+    # The games of the last run are a better guess than part of the libraries
+    stream = not games
+
+    def on_library(partial_games):
+        mark_startup(f"library read ({len(partial_games)} games)")
+        call_in_loop(apply_games, partial_games)
+
+    def scan():
+        try:
+            scanned = get_games(steam_id, steam_path, config.get("cache_dir"), config.get("scan_workers", DEFAULT_SCAN_WORKERS),
+                                on_library if stream else None)
+        except Exception as e:
+            call_in_loop(result.set_exception, e)
+        else:
+            call_in_loop(result.set_result, scanned)
+
+    # A daemon thread, not to_thread, which asyncio.run waits for when quitting
+    threading.Thread(target=scan, name="library-scan", daemon=True).start()
+    scanned = await result
+    mark_startup(f"library scanned ({len(scanned)} games)")
+    library_loading = False
+    apply_games(scanned)
+    filtered_games = update_games(view, search_query, sort_modes[sort_index], sort_ascending, fuzzy_search)
+    request_render()
+    watcher.start()
+
+async def main(live):
+    """
+    Main event loop for the TUI: a reader thread feeds the input task, which
+    updates the state, and the render task draws it.
 
-    Returns:
-        int: Number of lines required.
+    Args:
+        live (Live): The running Live display.
     """
-    text = Text("➤ " + entry)
-    lines = text.wrap(console, width, tab_size=4)
-    return len(lines)
+    global event_loop, render_requested
+    event_loop = asyncio.get_running_loop()
+    render_requested = asyncio.Event()
+    keys = asyncio.Queue()
+    threading.Thread(target=read_keys, args=(keys,), name="key-reader", daemon=True).start()
+    watch_resize(on_resize)
+    renderer = asyncio.create_task(render_task(live))
+    # Catch up with art that finished before the loop started
+    request_render()
+    try:
+        # A failed scan ends the session with its error
+        await asyncio.gather(input_task(keys), load_library())
+    finally:
+        renderer.cancel()
 
-def render():
+def build_layout():
     """
-    Render the entire TUI layout using Rich.
+    Build the layout tree. It is kept for the whole session; render() only
+    replaces the contents of its regions.
 
     Returns:
         Layout: The Rich Layout object representing the UI.
@@ -235,156 +522,164 @@ def render():
         Layout(name="footer", size=3)
     )
     layout["main"].split_row(
-        Layout(name="left", ratio=1),
-        Layout(name="right", ratio=3)
+        Layout(name="left", ratio=LEFT_RATIO),
+        Layout(name="right", ratio=RIGHT_RATIO)
     )
-    search_size = 3
     layout["main"]["left"].split_column(
-        Layout(name="search",size=search_size),
+        Layout(name="search", size=SEARCH_SIZE),
         Layout(name="library")
     )
+    return layout
 
-    info_icon_layout = Layout()
-    info_icon_layout.split_column(
-        Layout(name="info"),
-        Layout(name="icon")
-    )
+def render():
+    """
+    Update the regions of the layout whose inputs changed since the last call.
+
+    Each region is rebuilt only when the values it is drawn from differ from
+    the ones it was last drawn with: moving the cursor touches the library
+    list and the details, typing the search box and the list.
 
+    Returns:
+        list[str]: Names of the regions that were updated.
+    """
+    global shown_art_key
+    term_size = get_terminal_size()
+    max_height = term_size.lines - 6
+    max_width = term_size.columns - 6
+    left_width = max_width*(LEFT_RATIO/(LEFT_RATIO+RIGHT_RATIO))
+    left_height = max_height - SEARCH_SIZE
     current_game = filtered_games[selected]
+    theme = (current_palette_index, palette_selected)
 
-    max_height = os.get_terminal_size().lines - 6
-    max_width = os.get_terminal_size().columns - 6
+    regions = {}
 
-    term_width = os.get_terminal_size().columns
     theme_name = palette_selected.get("name", "Theme")
     banner_text = f"= TUI Media Player - {theme_name} ="
-    banner_line = banner_text.center(term_width, "=")
+    if profiling.enabled:
+        banner_text = f"{banner_text} {profile_overlay()} ="
+    if refresh_error is not None:
+        banner_text = f"{banner_text} Library refresh failed: {refresh_error} ="
+    regions["banner"] = ((theme, term_size.columns, banner_text), lambda: Align.center(
+        Text(banner_text.center(term_size.columns, "="), style=palette_selected["text"], justify="center")))
 
-    banner = Text(banner_line, style=palette_selected["text"], justify="center")
-    layout["banner"].update(Align.center(banner))
-
-    left_width =  max_width*((layout["main"]["left"].ratio)/(layout["main"]["left"].ratio+layout["main"]["right"].ratio))
-    left_height = max_height - search_size
+    subtitle = f"[dim]Sort by: {sort_modes[sort_index]} {'↑' if sort_ascending else '↓'}[/]"
+    regions["search"] = ((theme, search_query, fuzzy_search, subtitle), lambda: Panel(
+        Text(f"Search: {search_query}_"), title="Fuzzy search" if fuzzy_search else "Search", subtitle=subtitle, style=f"{palette_selected['search']}"))
 
     # Compute visible games
-    global first_visible_game_index
-    visible_games = compute_visible_games(filtered_games, current_game, first_visible_game_index, left_height, int(left_width))
-    
-    if visible_games:
-        first_game_name = visible_games[0][1]['name']
-        for idx, game in enumerate(filtered_games):
-            if game['name'] == first_game_name:
-                first_visible_game_index = idx
-                break
-    else:
-        first_visible_game_index = 0
+    with stage("visible_games"):
+        visible_games = library_list.visible(filtered_games, selected, left_height, int(left_width))
+    regions["library"] = ((theme, filtered_games, [i for i, _ in visible_games], selected), lambda: render_library(visible_games))
+
+    # Footer with commands
+    regions["footer"] = ((theme,), lambda: Panel(
+        Text("[W/S] Move | [Enter] Start | [/] Search | [TAB] Sort | [R] Reverse | [F] Fuzzy | [T] Theme | [Q] Exit"), style=palette_selected['text']))
+
+    info_text = build_info_text(current_game, palette_selected)
+    icon_width, icon_height = compute_icon_size(info_text, term_size)
+    try:
+        shown_art_key = None
+        ascii_icon = prefetcher.lookup(current_game["icon"], icon_width, icon_height)
+        if ascii_icon is None:
+            shown_art_key = prefetcher.resolve(current_game["icon"], icon_width, icon_height)[0]
+            ascii_icon = Text("Loading art...", style="dim")
+    except:
+        ascii_icon = Text(f"[bold cyan]{current_game['name']}[/bold cyan]\n╭────╮\n│ :) │\n╰────╯")
+    regions["right"] = ((theme, dict(current_game), ascii_icon.plain, ascii_icon.spans), lambda: render_details(info_text, ascii_icon))
+
+    updated = []
+    for name, (inputs, build) in regions.items():
+        previous = region_inputs.get(name)
+        if previous == inputs:
+            continue
+        layout[name].update(build())
+        region_inputs[name] = inputs
+        updated.append(name)
+    return updated
+
+def profile_overlay():
+    """
+    Returns:
+        str: Last and p95 frame time and key-to-paint latency, for the banner.
+    """
+    parts = []
+    for label, name in (("frame", "frame"), ("key→paint", "key_to_paint")):
+        times = profiling.recent(name)
+        if times is not None:
+            parts.append(f"{label} {times[0] * 1000:.1f}ms p95 {times[1] * 1000:.1f}ms")
+    return " | ".join(parts) or "profiling"
+
+def render_library(visible_games):
+    """
+    Build the library panel.
 
-    # Create the left panel with visible games
+    Args:
+        visible_games (list): (index, game) of the games on screen.
+
+    Returns:
+        Panel: The library list.
+    """
     table = Table.grid(padding=1)
     table.box = box.SIMPLE
-
-    # Add columns to the table
     for i, game in visible_games:
         prefix = "➤ " if i == selected else ""
         row = Text(prefix + str(game["name"]))
         if i == selected:
             row.stylize(f"bold {palette_selected['selected']}")
         table.add_row(row)
+    return Panel(table, title="Library", box=box.DOUBLE, style=palette_selected["text"])
 
-    search_panel = Panel(Text(f"Search: {search_query}_"), title="Search", subtitle=f"[dim]Sort by: {sort_modes[sort_index]} {'↑' if sort_ascending else '↓'}[/]", style=f"{palette_selected['search']}")
-    lib_panel = Panel(table, title="Library", box=box.DOUBLE, style=palette_selected["text"])
-
-    layout["main"]["left"]["search"].update(search_panel)
-    layout["main"]["left"]["library"].update(lib_panel)
-
-    # Footer with commands
-    footer_text = Text("[W/S] Move | [Enter] Start | [/] Search | [TAB] Sort | [R] Reverse | [T] Theme | [Q] Exit")
-    layout["footer"].update(Panel(footer_text, style=palette_selected['text']))
-
-    info_title = Text(f"{current_game['name']} \n", style=palette_selected['game_title'])
-    info_details = Text(f"\n\nAppId: {current_game['appid']}\nExe: {current_game['exe']}\nCategory: {current_game['category']}\nIcon: {current_game['icon']}", style=palette_selected['info'])
-
-    info_text = Text()
-    info_text.append(info_title)
-    info_text.append(info_details)
-
-    if(current_game['last_played'] != 0):
-        last_played = datetime.fromtimestamp(current_game['last_played'])
-        last_player = last_played.strftime("%b %d %Y %H:%M")
-        last_played_text = Text(f"\n\nLast Played: {last_player}", style=palette_selected['time'])
-        info_text.append(last_played_text)
-
-    if(current_game['play_time'] != 0):
-        play_time = current_game['play_time']
-        play_time_hours = play_time / 60
-        play_time_minutes = play_time % 60
-        play_time_text = Text(f"\n\nPlay Time: {play_time_hours:.0f} hours {play_time_minutes} minutes", style=palette_selected['time'])
-        info_text.append(play_time_text)
-
-    info_icon_layout["info"].update(Align.left(info_text))
-
-    icon_padding = 2
-    right_width =  max_width*((layout["main"]["right"].ratio)/(layout["main"]["left"].ratio+layout["main"]["right"].ratio))
-    right_width -= estimate_entry_height(info_text.__str__(), int(right_width))
-    icon_width = int(right_width + icon_padding)
-    icon_height = int(max_height/2)
-
-    try:
-        ascii_icon = image_to_ascii(current_game["icon"], icon_width, icon_height)
-    except:
-        ascii_icon = Text(f"[bold cyan]{current_game['name']}[/bold cyan]\n╭────╮\n│ :) │\n╰────╯")
+def render_details(info_text, ascii_icon):
+    """
+    Build the details panel.
 
-    info_icon_layout["icon"].update(Align.right(ascii_icon))
+    Args:
+        info_text (Text): Details text, as built by build_info_text.
+        ascii_icon (Text): Icon art or placeholder.
 
-    # Insert everything into the right panel
-    layout["right"].update(Panel(info_icon_layout, title="Details", box=box.DOUBLE, style=palette_selected["text"]))
+    Returns:
+        Panel: The details panel.
+    """
+    info_icon_layout = Layout()
+    info_icon_layout.split_column(
+        Layout(Align.left(info_text), name="info"),
+        Layout(Align.right(ascii_icon), name="icon")
+    )
+    return Panel(info_icon_layout, title="Details", box=box.DOUBLE, style=palette_selected["text"])
 
-    return layout
+library_list = VirtualList(estimate_entry_height)
+prefetcher = ArtPrefetcher(art_cache, config.get("prefetch_workers", 2), on_ready=on_art_ready)
+watcher = LibraryWatcher(steam_id, steam_path, on_library_change, poll_interval=config.get("watch_poll_interval", DEFAULT_POLL_INTERVAL),
+                         on_error=lambda e: call_in_loop(show_refresh_error, e))
 
-# Live rendering and input
-with Live(render(), screen=True, refresh_per_second=10) as live:
+def print_startup_report():
     """
-    Main event loop for the TUI. Handles user input and updates the UI.
+    Print the startup stages with their time since the start of the program.
     """
-    while True:
-        key = get_key()
+    table = Table(title="Startup", box=box.SIMPLE)
+    table.add_column("Stage")
+    table.add_column("At (ms)", justify="right")
+    table.add_column("Took (ms)", justify="right")
+    previous = 0.0
+    for stage, at in startup_times:
+        table.add_row(stage, f"{at * 1000:.1f}", f"{(at - previous) * 1000:.1f}")
+        previous = at
+    console.print(table)
+
+layout = build_layout()
+render()
 
-        if search_mode:
-            if key == "\r": # Enter: return to normal mode
-                search_mode = False
-            elif key == "\x08": # Backspace: delete char
-                search_query = search_query[:-1]
-                selected = 0
-            elif key.isprintable(): # OTHER: add to search_query
-                search_query += key
-                selected = 0
-        else:
-            if key == "q":  # Q: save config and quit
-                quit_steam()
-            elif key == "/":    # /: search mode
-                search_mode = not search_mode
-            elif key == "\t":   # TAB: sort mode
-                sort_index = (sort_index + 1) % len(sort_modes)
-                selected = 0
-            elif key == "t":    # T: change theme
-                current_palette_index = (current_palette_index + 1) % len(palettes)
-                palette_selected = palettes[current_palette_index]
-            elif key == "r":    # R: reverse order
-                sort_ascending = not sort_ascending
-            elif key == "w":    # W: move up
-                selected = (selected - 1) % len(filtered_games)
-            elif key == "s":    # S: move down
-                selected = (selected + 1) % len(filtered_games)
-            elif key == "\r":   # Enter: start game
-                try:
-                    command = filtered_games[selected]["exe"]
-                    subprocess.Popen(command, shell=True)
-                    time.sleep(5)
-                    games = get_games(steam_id, steam_path)
-                except Exception as e:
-                    console.print(f"[bold red]Error:[/] {e}")
-
-        filtered_games = update_games(games, search_query, sort_modes[sort_index], sort_ascending)
-        if filtered_games.__len__() <= 0:
-            filtered_games = no_result
-        live.update(render())
\ No newline at end of file
+# Live rendering and input
+try:
+    with Live(layout, screen=True, auto_refresh=False) as live:
+        mark_startup("first frame")
+        asyncio.run(main(live))
+finally:
+    if refresh_error is not None:
+        console.print("Last library refresh failed:")
+        console.print("".join(traceback.format_exception(refresh_error)), markup=False, highlight=False)
+    if args.startup_report:
+        print_startup_report()
+    if profiling.enabled:
+        for path in profiling.write_report(args.profile_dir or os.path.join(config.get("cache_dir") or get_cache_dir(), "profile")):
+            console.print(f"Profile written to {path}")
@@ -0,0 +1,311 @@
+"""
+synthetic_steam.py
+
+Writes a fake Steam installation of a chosen size, for benchmarks and for
+trying the TUI without Steam: libraryfolders.vdf, appmanifests spread over
+several libraries, a binary shortcuts.vdf, localconfig.vdf, gameprocess_log.txt
+and the librarycache images.
+
+    python synthetic_steam.py ROOT --games 1000 --libraries 3
+"""
+
+import io
+import os
+import json
+import random
+import struct
+import argparse
+import vdf
+from datetime import datetime, timedelta
+from parser import TYPE_MAP, TYPE_STRING, TYPE_INT32, TYPE_END
+
+# Bump when the generated files change, so that saved trees are regenerated
+SYNTHETIC_VERSION = 1
+DEFAULT_STEAM_ID = "12345678"
+# Distinct icons written; games share them round-robin
+ICON_VARIANTS = 32
+
+WORDS = ["Hollow", "Knight", "Dark", "Souls", "Stardew", "Valley", "Half", "Life", "Portal", "Celeste",
+         "Hades", "Terraria", "Factorio", "Rimworld", "Outer", "Wilds", "Disco", "Elysium", "Return", "Obra",
+         "Dinn", "Into", "Breach", "Slay", "Spire", "Dead", "Cells", "Ori", "Blind", "Forest",
+         "Inside", "Limbo", "Journey", "Control", "Tunic", "Noita", "Cuphead", "Sekiro", "Shadows", "Twice"]
+# Non-ASCII words, so that searches exercise accent and case folding
+ACCENTED_WORDS = ["Pokémon", "Señor", "Café", "Über", "Ōkami", "Déjà", "Vu", "Ærø", "Straße", "Fête"]
+CATEGORIES = ["Emulators", "Favorites", "Tools", "Mods", "Indie"]
+
+def dump_binary_vdf(data: dict) -> bytes:
+    """
+    Encode a map in Steam's binary VDF format, as read by parser.read_binary_map and parser.iter_shortcuts.
+
+    Args:
+        data (dict): Map of str keys to dicts, str or unsigned 32-bit int values.
+
+    Returns:
+        bytes: The encoded map, with its end marker.
+    """
+    out = bytearray()
+    for key, value in data.items():
+        name = str(key).encode("utf-8") + b"\0"
+        if isinstance(value, dict):
+            out += bytes([TYPE_MAP]) + name + dump_binary_vdf(value)
+        elif isinstance(value, int):
+            out += bytes([TYPE_INT32]) + name + struct.pack("<I", value)
+        else:
+            out += bytes([TYPE_STRING]) + name + str(value).encode("utf-8") + b"\0"
+    out.append(TYPE_END)
+    return bytes(out)
+
+def game_name(rng: random.Random, i: int) -> str:
+    """
+    Args:
+        rng (random.Random): Random source.
+        i (int): Index of the game, keeps names unique.
+
+    Returns:
+        str: A made-up game name.
+    """
+    words = rng.sample(WORDS, rng.randint(1, 3))
+    if rng.random() < 0.1:
+        words.insert(rng.randint(0, len(words)), rng.choice(ACCENTED_WORDS))
+    return f"{' '.join(words)} {i}"
+
+def icon_bytes(rng: random.Random) -> bytes:
+    """
+    Returns:
+        bytes: A 32x32 RGBA PNG with a few shapes, so the ASCII art has edges and colours.
+    """
+    from PIL import Image, ImageDraw
+    img = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for _ in range(3):
+        x0, y0 = rng.randint(0, 20), rng.randint(0, 20)
+        box = (x0, y0, x0 + rng.randint(6, 12), y0 + rng.randint(6, 12))
+        color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255), 255)
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=color)
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+def header_bytes() -> bytes:
+    """
+    Returns:
+        bytes: A 460x215 JPEG gradient, the size of a Steam header image.
+    """
+    from PIL import Image
+    img = Image.linear_gradient("L").resize((460, 215)).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=70)
+    return buf.getvalue()
+
+def hero_bytes(rng: random.Random, width: int = 1920, height: int = 620) -> bytes:
+    """
+    Args:
+        rng (random.Random): Source of the shapes.
+        width (int): Image width, by default that of a Steam library hero.
+        height (int): Image height.
+
+    Returns:
+        bytes: A JPEG with shapes over a gradient and some noise, so that it
+            compresses and decodes like a picture rather than a flat image.
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x0, y0 = rng.randint(0, width), rng.randint(0, height)
+        box = (x0, y0, x0 + rng.randint(width // 20, width // 4), y0 + rng.randint(height // 20, height // 3))
+        color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=color)
+    noise = np.random.default_rng(rng.randrange(2 ** 32)).normal(0, 12, (height, width, 3))
+    img = Image.fromarray(np.clip(np.asarray(img) + noise, 0, 255).astype(np.uint8))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+def write_text(path: str, data):
+    """
+    Write a text file, creating its directory.
+
+    Args:
+        path (str): File path.
+        data (str | dict): Text, or a map written as text VDF.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(data if isinstance(data, str) else vdf.dumps(data, pretty=True))
+
+def generate_steam(root: str, games: int = 1000, libraries: int = 2, shortcuts: int | None = None,
+                   log_lines: int | None = None, images: float = 0.9, steam_id: str = DEFAULT_STEAM_ID,
+                   seed: int = 0) -> dict:
+    """
+    Write a fake Steam installation under root, plus a config.json pointing at it.
+
+    The output only depends on the arguments: the same seed gives the same files.
+    Library 0 is root itself, the others are root/libraries/libN.
+
+    Args:
+        root (str): Directory to write to, created if missing.
+        games (int): Number of installed games (appmanifests).
+        libraries (int): Number of Steam libraries the games are spread over.
+        shortcuts (int, optional): Number of non-Steam shortcuts, defaults to 5% of games.
+        log_lines (int, optional): Lines of gameprocess_log.txt, defaults to 5 per game.
+        images (float): Fraction of the games with librarycache images.
+        steam_id (str): Steam ID of the user folder.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Description of the tree: 'steam_path', 'steam_id', 'libraries', 'appids' and the
+            paths of 'shortcuts', 'localconfig' and 'gameprocess'.
+    """
+    rng = random.Random(seed)
+    root = os.path.abspath(root)
+    shortcuts = max(1, games // 20) if shortcuts is None else shortcuts
+    log_lines = games * 5 if log_lines is None else log_lines
+    library_paths = [root] + [os.path.join(root, "libraries", f"lib{i}") for i in range(1, max(1, libraries))]
+
+    # Appmanifests, round-robin over the libraries
+    appids = []
+    library_apps = [{} for _ in library_paths]
+    for i in range(games):
+        appid = 1000 + i * 10
+        appids.append(appid)
+        lib = i % len(library_paths)
+        size = rng.randint(10 ** 7, 10 ** 11)
+        library_apps[lib][str(appid)] = str(size)
+        last_played = 1_600_000_000 + rng.randint(0, 10 ** 8) if rng.random() < 0.7 else 0
+        write_text(os.path.join(library_paths[lib], "steamapps", f"appmanifest_{appid}.acf"), {"AppState": {
+            "appid": str(appid),
+            "universe": "1",
+            "LauncherPath": "C:\\Program Files (x86)\\Steam\\steam.exe",
+            "name": game_name(rng, i),
+            "StateFlags": "4",
+            "installdir": f"Game{i}",
+            "LastUpdated": str(1_600_000_000 + rng.randint(0, 10 ** 8)),
+            "LastPlayed": str(last_played),
+            "SizeOnDisk": str(size),
+            "StagingSize": "0",
+            "buildid": str(rng.randint(10 ** 6, 10 ** 7)),
+            "LastOwner": "76561198000000000",
+            "UpdateResult": "0",
+            "BytesToDownload": "0",
+            "BytesDownloaded": "0",
+            "AutoUpdateBehavior": "0",
+            "InstalledDepots": {str(appid + 1): {"manifest": str(rng.getrandbits(63)), "size": str(size)}},
+            "UserConfig": {"language": "english"},
+            "MountedConfig": {"language": "english"},
+        }})
+
+    write_text(os.path.join(root, "steamapps", "libraryfolders.vdf"), {"libraryfolders": {
+        str(i): {"path": path, "label": "", "contentid": str(rng.getrandbits(62)), "totalsize": "0", "apps": apps}
+        for i, (path, apps) in enumerate(zip(library_paths, library_apps))
+    }})
+
+    # librarycache: an icon and a header per game, shared bytes so large trees are quick to write
+    icons = [icon_bytes(rng) for _ in range(ICON_VARIANTS)]
+    header = header_bytes()
+    cache = os.path.join(root, "appcache", "librarycache")
+    icon_paths = []
+    for i, appid in enumerate(appids):
+        if rng.random() >= images:
+            continue
+        directory = os.path.join(cache, str(appid))
+        os.makedirs(directory, exist_ok=True)
+        icon_path = os.path.join(directory, f"{rng.getrandbits(64):016x}.png")
+        with open(icon_path, "wb") as f:
+            f.write(icons[i % ICON_VARIANTS])
+        with open(os.path.join(directory, "header.jpg"), "wb") as f:
+            f.write(header)
+        icon_paths.append(icon_path)
+
+    # shortcuts.vdf
+    config_dir = os.path.join(root, "userdata", steam_id, "config")
+    os.makedirs(config_dir, exist_ok=True)
+    shortcut_entries = {}
+    shortcut_exes = []
+    for j in range(shortcuts):
+        appid = rng.getrandbits(31) | 0x80000000
+        exe = f"C:\\Games\\Shortcut{j}\\game{j}.exe"
+        shortcut_exes.append((appid, exe))
+        shortcut_entries[str(j)] = {
+            "appid": appid,
+            "AppName": game_name(rng, games + j),
+            "Exe": f'"{exe}"',
+            "StartDir": f'"C:\\Games\\Shortcut{j}\\"',
+            "icon": rng.choice(icon_paths) if icon_paths and rng.random() < 0.5 else "",
+            "ShortcutPath": "",
+            "LaunchOptions": "",
+            "IsHidden": 0,
+            "AllowDesktopConfig": 1,
+            "AllowOverlay": 1,
+            "OpenVR": 0,
+            "Devkit": 0,
+            "DevkitGameID": "",
+            "DevkitOverrideAppID": 0,
+            "LastPlayTime": 1_700_000_000 + j,
+            "FlatpakAppID": "",
+            "tags": {"0": rng.choice(CATEGORIES)} if rng.random() < 0.5 else {},
+        }
+    shortcuts_path = os.path.join(config_dir, "shortcuts.vdf")
+    with open(shortcuts_path, "wb") as f:
+        f.write(dump_binary_vdf({"shortcuts": shortcut_entries}))
+
+    # localconfig.vdf: play times of most games, among unrelated settings
+    apps = {}
+    for appid in appids:
+        if rng.random() < 0.8:
+            apps[str(appid)] = {"LastPlayed": str(1_650_000_000 + rng.randint(0, 10 ** 7)),
+                                "Playtime": str(rng.randint(0, 10 ** 4)),
+                                "cloud": {"last_sync_state": "synchronized"}}
+    localconfig_path = os.path.join(config_dir, "localconfig.vdf")
+    write_text(localconfig_path, {"UserLocalConfigStore": {
+        "friends": {str(76561198000000000 + k): {"name": f"Friend {k}"} for k in range(50)},
+        "Software": {"Valve": {"Steam": {"apps": apps}}},
+        "WebStorage": {"key": "value"},
+    }})
+
+    # gameprocess_log.txt: shortcut and game sessions, chronological
+    lines = []
+    start = datetime(2024, 1, 1)
+    for n in range(log_lines):
+        timestamp = (start + timedelta(minutes=n)).strftime("%Y-%m-%d %H:%M:%S")
+        if shortcut_exes and (not appids or rng.random() < 0.3):
+            appid, exe = rng.choice(shortcut_exes)
+            gameid = (appid << 32) | 0x02000000
+        else:
+            gameid = rng.choice(appids)
+            exe = f"C:\\Steam\\steamapps\\common\\Game{gameid}\\game.exe"
+        pid = rng.randint(100, 65535)
+        if n % 2 == 0:
+            lines.append(f'[{timestamp}] AppID {gameid} adding PID {pid} as a tracked process ""{exe}""\n')
+        else:
+            lines.append(f"[{timestamp}] AppID {gameid} no longer tracking PID {pid}, exit code 0\n")
+    gameprocess_path = os.path.join(root, "logs", "gameprocess_log.txt")
+    write_text(gameprocess_path, "".join(lines))
+
+    with open(os.path.join(root, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"steam_path": root, "steam_id": steam_id, "theme": 0, "sort_index": 0, "ascending": False}, f, indent=4)
+
+    return {
+        "steam_path": root,
+        "steam_id": steam_id,
+        "libraries": library_paths,
+        "appids": appids,
+        "shortcuts": shortcuts_path,
+        "localconfig": localconfig_path,
+        "gameprocess": gameprocess_path,
+    }
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Write a fake Steam installation")
+    arg_parser.add_argument("root", help="directory to write the installation to")
+    arg_parser.add_argument("--games", type=int, default=1000, help="installed games (default 1000)")
+    arg_parser.add_argument("--libraries", type=int, default=2, help="Steam libraries (default 2)")
+    arg_parser.add_argument("--shortcuts", type=int, default=None, help="non-Steam shortcuts (default 5%% of the games)")
+    arg_parser.add_argument("--log-lines", type=int, default=None, help="gameprocess_log.txt lines (default 5 per game)")
+    arg_parser.add_argument("--images", type=float, default=0.9, help="fraction of games with images (default 0.9)")
+    arg_parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    args = arg_parser.parse_args()
+
+    tree = generate_steam(args.root, args.games, args.libraries, args.shortcuts, args.log_lines, args.images, seed=args.seed)
+    print(f"Wrote {len(tree['appids'])} games in {len(tree['libraries'])} libraries to {tree['steam_path']}")
@@ -0,0 +1,75 @@
+"""
+terminal.py
+
+Terminal size, cached between resizes.
+"""
+
+import os
+import signal
+import threading
+
+_size = None
+_watching = False
+_listeners = []
+
+def get_terminal_size() -> os.terminal_size:
+    """
+    Return the size of the terminal. Once watch_resize() is active the value is
+    cached and only queried again after a SIGWINCH.
+
+    Returns:
+        os.terminal_size: Columns and lines of the terminal.
+
+    Raises:
+        OSError: If the standard output is not a terminal.
+    """
+    global _size
+    size = _size
+    if size is None or not _watching:
+        size = _size = os.get_terminal_size()
+    return size
+
+def _on_resize(signum, frame):
+    global _size
+    _size = None
+    for callback in _listeners:
+        callback()
+
+def watch_resize(callback=None) -> bool:
+    """
+    Start caching the terminal size, refreshing it on SIGWINCH.
+
+    The callback runs in the signal handler, in the main thread, so it
+    should only hand work over to another thread.
+
+    Args:
+        callback (callable, optional): Called with no arguments after each resize.
+
+    Returns:
+        bool: False where SIGWINCH is not available (Windows) or outside the
+            main thread; the size is then queried on every call.
+    """
+    global _watching
+    if callback is not None:
+        _listeners.append(callback)
+    if _watching:
+        return True
+    if not hasattr(signal, "SIGWINCH") or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGWINCH, _on_resize)
+    _watching = True
+    return True
+
+def parse_size(value: str) -> os.terminal_size:
+    """
+    Args:
+        value (str): 'COLUMNSxLINES', e.g. '160x48'.
+
+    Returns:
+        os.terminal_size: The size.
+
+    Raises:
+        ValueError: If value is not two integers separated by 'x'.
+    """
+    columns, lines = (int(n) for n in value.lower().split("x"))
+    return os.terminal_size((columns, lines))
@@ -0,0 +1,182 @@
+"""
+vdf_stream.py
+
+Selective reader for text VDF files (appmanifests, localconfig.vdf, ...).
+
+Instead of building the whole nested dict like vdf.load, load_selected walks
+the token stream and only keeps the keys matching a path filter such as
+"UserLocalConfigStore/Software/Valve/Steam/apps/*/{LastPlayed,Playtime}".
+Subtrees that cannot match are skipped by scanning for braces, without
+decoding or allocating anything for them.
+"""
+
+import os
+import re
+import mmap
+from typing import Any, Dict, List
+
+# One token, after whitespace and // comments: quoted string, brace,
+# conditional like [$WIN32] or unquoted string.
+TOKEN_RE = re.compile(rb'(?:\s+|//[^\n]*)*(?:"((?:[^"\\]|\\.)*)"|([{}])|(\[[^\]\s]*\])|([^\s{}"]+))')
+# Everything up to the next brace that is not inside a string or comment
+SKIP_RE = re.compile(rb'(?:[^"{}/]+|"(?:[^"\\]|\\.)*"|//[^\n]*|/)*')
+ESCAPE_RE = re.compile(r'\\(.)')
+ESCAPES = {'n': '\n', 't': '\t', 'v': '\v', 'b': '\b', 'r': '\r', 'f': '\f', 'a': '\a'}
+BOM = b'\xef\xbb\xbf'
+
+def compile_pattern(pattern: str) -> List[frozenset | None]:
+    """
+    Compile a path filter into one matcher per path segment.
+
+    Segments are separated by '/'. A segment is a key, '*' for any key, or
+    '{a,b}' for a set of keys. Matching ignores case, like Steam does.
+
+    Args:
+        pattern (str): Path filter.
+
+    Returns:
+        List[frozenset | None]: Lower-cased key sets per segment, None for '*'.
+    """
+    segments = []
+    for part in pattern.strip('/').split('/'):
+        if part == '*':
+            segments.append(None)
+        elif part.startswith('{') and part.endswith('}'):
+            segments.append(frozenset(p.strip().lower() for p in part[1:-1].split(',')))
+        else:
+            segments.append(frozenset([part.lower()]))
+    return segments
+
+def decode_token(raw: bytes) -> str:
+    """
+    Decode a string token and resolve its escape sequences.
+
+    Args:
+        raw (bytes): Token bytes, without quotes.
+
+    Returns:
+        str: Decoded string.
+    """
+    text = raw.decode('utf-8', errors='replace')
+    if '\\' in text:
+        text = ESCAPE_RE.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), text)
+    return text
+
+def _next_token(buf, pos: int):
+    """
+    Returns:
+        tuple: (kind, raw, pos) where kind is 'str', '{', '}' or None at end of input.
+    """
+    while True:
+        m = TOKEN_RE.match(buf, pos)
+        if m is None:
+            return None, None, pos
+        pos = m.end()
+        if m.group(3) is not None:
+            continue  # conditionals such as [$WIN32] are ignored
+        if m.group(2) is not None:
+            return m.group(2).decode(), None, pos
+        raw = m.group(1) if m.group(1) is not None else m.group(4)
+        return 'str', raw, pos
+
+def _skip_map(buf, pos: int) -> int:
+    """
+    Skip a subtree whose opening brace was already consumed.
+
+    Returns:
+        int: Offset just past the matching closing brace.
+    """
+    depth = 1
+    size = len(buf)
+    match = SKIP_RE.match
+    while True:
+        pos = match(buf, pos).end()
+        if pos >= size or buf[pos] == 0x22:  # end of input or unterminated string
+            raise ValueError("Unexpected end of file inside a map")
+        if buf[pos] == 0x7B:  # {
+            depth += 1
+        else:  # }
+            depth -= 1
+        pos += 1
+        if depth == 0:
+            return pos
+
+def _read_map(buf, pos: int, states: list, out: Dict[str, Any], keep_all: bool, top_level: bool) -> int:
+    """
+    Read the entries of a map into out, keeping only those selected by states.
+
+    Args:
+        buf (bytes | mmap.mmap): File contents.
+        pos (int): Offset just past the opening brace (or 0 for the top level).
+        states (list): (segments, index) pairs: the patterns still alive at this depth.
+        out (Dict[str, Any]): Dict receiving the selected entries.
+        keep_all (bool): True when an enclosing key fully matched a pattern.
+        top_level (bool): True for the implicit top-level map, which ends at end of input.
+
+    Returns:
+        int: Offset just past the closing brace.
+    """
+    while True:
+        kind, raw, pos = _next_token(buf, pos)
+        if kind is None:
+            if top_level:
+                return pos
+            raise ValueError("Unexpected end of file inside a map")
+        if kind == '}':
+            if top_level:
+                raise ValueError(f"Unbalanced '}}' at offset {pos}")
+            return pos
+        if kind == '{':
+            raise ValueError(f"Missing key before '{{' at offset {pos}")
+
+        key = decode_token(raw)
+        matched = keep_all
+        next_states = []
+        if not keep_all:
+            lowered = key.lower()
+            for segments, index in states:
+                segment = segments[index]
+                if segment is None or lowered in segment:
+                    if index == len(segments) - 1:
+                        matched = True
+                    else:
+                        next_states.append((segments, index + 1))
+
+        kind, raw, pos = _next_token(buf, pos)
+        if kind == '{':
+            if matched or next_states:
+                child = out.get(key)
+                if not isinstance(child, dict):
+                    child = out[key] = {}  # duplicate map keys are merged, as vdf.load does
+                pos = _read_map(buf, pos, next_states, child, matched, False)
+            else:
+                pos = _skip_map(buf, pos)
+        elif kind == 'str':
+            if matched:
+                out[key] = decode_token(raw)
+        else:
+            raise ValueError(f"Missing value for key '{key}' at offset {pos}")
+
+def load_selected(path: str, patterns: List[str]) -> Dict[str, Any]:
+    """
+    Parse a text VDF file keeping only the entries selected by path filters.
+
+    A pattern that ends on a map selects the whole map. Maps along a matching
+    path are always created, even when none of their children is selected.
+
+    Args:
+        path (str): Path to the VDF file.
+        patterns (List[str]): Path filters, see compile_pattern.
+
+    Returns:
+        Dict[str, Any]: Nested dict shaped like the vdf.load result, restricted to the selection.
+    """
+    states = [(compile_pattern(p), 0) for p in patterns]
+    result = {}
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return result
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            pos = len(BOM) if buf[:len(BOM)] == BOM else 0
+            _read_map(buf, pos, states, result, False, True)
+    return result
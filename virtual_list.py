@@ -0,0 +1,101 @@
+"""
+virtual_list.py
+
+Scrolling window over a list of rows of varying height, for the library panel.
+"""
+
+from bisect import bisect_left
+
+class VirtualList:
+    """
+    Computes which rows of a list fit in a panel, keeping the selected row visible.
+
+    Row heights come from measure(name, width) and are cached per (name,
+    width) for the whole session. For the current list and width, a
+    prefix-sum array of the heights (each row plus one line of padding) is
+    extended lazily as far as the rows that have been shown, so finding the
+    first row for a scroll position is a bisection and a render only
+    measures the rows on screen. The scroll position is the index of the
+    first visible row.
+    """
+
+    def __init__(self, measure):
+        self.measure = measure
+        self.first = 0
+        self._heights = {}
+        self._rows = None
+        self._width = None
+        self._offsets = [0]
+
+    def height(self, name: str, width: int) -> int:
+        """
+        Args:
+            name (str): Row text.
+            width (int): Width available for wrapping.
+
+        Returns:
+            int: Number of lines the row takes.
+        """
+        key = (name, width)
+        h = self._heights.get(key)
+        if h is None:
+            h = self._heights[key] = self.measure(name, width)
+        return h
+
+    def visible(self, rows: list[dict], selected: int, height: int, width: int) -> list[tuple[int, dict]]:
+        """
+        Scroll so that the selected row is visible and return the rows on screen.
+
+        Scrolling moves as little as possible: up to the selected row if it is
+        above the window, or down until it fits at the bottom if it is below.
+
+        Args:
+            rows (list[dict]): Rows to display, each with a 'name'.
+            selected (int): Index of the selected row.
+            height (int): Lines available.
+            width (int): Width for text wrapping.
+
+        Returns:
+            list[tuple[int, dict]]: (index, row) of the visible rows.
+        """
+        if rows is not self._rows or width != self._width:
+            self._rows = rows
+            self._width = width
+            self._offsets = [0]
+        n = len(rows)
+        first = min(self.first, max(n - 1, 0))
+
+        if selected < first:
+            first = selected
+        elif selected > first:
+            if len(self._offsets) > selected + 1:
+                # Bottom of the selected row, relative to the top of the window, must fit
+                bottom = self._offsets[selected + 1] - 1
+                if bottom - self._offsets[first] > height:
+                    first = min(max(first, bisect_left(self._offsets, bottom - height, first, selected + 1)), selected)
+            else:
+                # Rows not measured yet (e.g. a jump to the end): walk back from
+                # the selected row, measuring only the rows that end up on screen
+                top = selected
+                total = self.height(rows[selected]["name"], width)
+                while top > first:
+                    h = self.height(rows[top - 1]["name"], width) + 1
+                    if total + h > height:
+                        break
+                    total += h
+                    top -= 1
+                first = top
+        self.first = first
+
+        visible = []
+        total = 0
+        offsets = self._offsets
+        for i in range(first, n):
+            h = self.height(rows[i]["name"], width)
+            if len(offsets) == i + 1:
+                offsets.append(offsets[i] + h + 1)
+            if total + h > height:
+                break
+            visible.append((i, rows[i]))
+            total += h + 1
+        return visible
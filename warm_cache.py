@@ -0,0 +1,180 @@
+"""
+warm_cache.py
+
+Renders the icon art of the whole library into the art cache ahead of time,
+on every core, so that browsing a large library never waits for an icon.
+
+    python -m steam_tui warm-cache
+    python -m steam_tui warm-cache --size 160x48 --size 120x40
+
+Art is sized for a terminal, like the interface does, so run it from the
+terminal the TUI is used in or pass its size. It is rendered from the same
+decoded levels (art_pyramid.py) as in the interface, which also keeps them. Icons already in the cache are
+skipped, so an interrupted run picks up where it stopped.
+"""
+
+import os
+import sys
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from art_cache import ArtCache, DEFAULT_MAX_MB, fit_to_terminal, render_payload
+from art_pyramid import PyramidCache, DEFAULT_MAX_MB as DEFAULT_PYRAMID_MB
+from art_styles import DEFAULT_COLOR_MODE
+from layout import build_info_text, compute_icon_size
+from load_themes import get_themes
+from steam_tui import get_games, DEFAULT_SCAN_WORKERS
+from game_table import GameTable
+from library_view import SORT_MODES
+
+# Renders queued per worker: enough to keep them busy, few enough to stop quickly
+QUEUED_PER_WORKER = 4
+
+# Pyramids of the worker process, see _init_worker
+_pyramids = None
+
+def _init_worker(pyramids: PyramidCache | None):
+    global _pyramids
+    _pyramids = pyramids
+
+def _render(image_path: str, width: int, height: int, colors: str) -> tuple[str, list]:
+    return render_payload(image_path, width, height, colors, _pyramids)
+
+def art_jobs(games: GameTable, sizes: list[os.terminal_size], art_cache: ArtCache, palette: dict) -> list[tuple[str, str, int, int]]:
+    """
+    List the art the interface would ask for, in the given game order.
+
+    Args:
+        games (GameTable): The games, in the order to render them.
+        sizes (list[os.terminal_size]): Terminal sizes to render for.
+        art_cache (ArtCache): Cache the keys are built for.
+        palette (dict): Theme, for the details text the icon size depends on.
+
+    Returns:
+        list[tuple[str, str, int, int]]: (key, image_path, width, height) of each
+            icon, once per distinct size, skipping missing icons.
+    """
+    jobs = []
+    seen = set()
+    for game in games:
+        if not game["icon"]:
+            continue
+        info_text = build_info_text(game, palette)
+        for term_size in sizes:
+            width, height = fit_to_terminal(*compute_icon_size(info_text, term_size), term_size)
+            key = art_cache.key(game["icon"], width, height)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            jobs.append((key, game["icon"], width, height))
+    return jobs
+
+def warm_cache(art_cache: ArtCache, jobs: list[tuple[str, str, int, int]], workers: int | None = None, on_progress=None) -> dict:
+    """
+    Render the art missing from the cache on a process pool, writing each
+    result as soon as it arrives. Workers render like art_cache.render does,
+    through copies of its PyramidCache if it has one. Stops once the cache would start evicting
+    what it just stored.
+
+    Args:
+        art_cache (ArtCache): Destination.
+        jobs (list[tuple[str, str, int, int]]): As returned by art_jobs, in priority order.
+        workers (int, optional): Processes, default one per CPU.
+        on_progress (callable, optional): Called with the counts after each render.
+
+    Returns:
+        dict: 'total', 'cached' (already there), 'rendered', 'failed' and
+            'skipped' (left out because the cache is full).
+    """
+    counts = {"total": len(jobs), "cached": 0, "rendered": 0, "failed": 0, "skipped": 0}
+    todo = []
+    for job in jobs:
+        if art_cache.contains(job[0]):
+            counts["cached"] += 1
+        else:
+            todo.append(job)
+    # Room left below the size eviction shrinks the cache to
+    budget = int(art_cache.max_bytes * 0.8) - art_cache.disk_usage()
+
+    workers = workers or os.cpu_count() or 1
+    pending = {}
+    queue = iter(todo)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(art_cache.pyramids,)) as executor:
+        try:
+            while True:
+                while budget > 0 and len(pending) < workers * QUEUED_PER_WORKER:
+                    job = next(queue, None)
+                    if job is None:
+                        break
+                    pending[executor.submit(_render, *job[1:], art_cache.colors)] = job
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)[0]
+                    try:
+                        payload = future.result()
+                    except Exception:
+                        counts["failed"] += 1
+                        continue
+                    if budget <= 0:
+                        counts["skipped"] += 1
+                        continue
+                    budget -= art_cache.put_payload(key, payload)
+                    counts["rendered"] += 1
+                if on_progress is not None:
+                    on_progress(counts)
+        finally:
+            for future in pending:
+                future.cancel()
+    counts["skipped"] += sum(1 for _ in queue)
+    return counts
+
+def warm_library(steam_id: str, steam_path: str, config: dict, sizes: list[os.terminal_size] | None = None,
+                 workers: int | None = None) -> int:
+    """
+    The warm-cache command: render the art of the whole library, reporting
+    progress on standard error.
+
+    Args:
+        steam_id (str): The user's Steam ID.
+        steam_path (str): The root path of the Steam installation.
+        config (dict): Settings read from config.json.
+        sizes (list[os.terminal_size], optional): Terminal sizes to render for, default this terminal.
+        workers (int, optional): Render processes, default one per CPU.
+
+    Returns:
+        int: Exit status, 130 if interrupted.
+    """
+    palettes = get_themes()
+    palette = palettes[config.get("theme", 0)] if 0 <= config.get("theme", 0) < len(palettes) else palettes[0]
+    sizes = sizes or [shutil.get_terminal_size()]
+    pyramids = PyramidCache(config.get("cache_dir"), config.get("art_pyramid_mb", DEFAULT_PYRAMID_MB))
+    art_cache = ArtCache(config.get("cache_dir"), config.get("art_cache_mb", DEFAULT_MAX_MB), pyramids,
+                         config.get("art_colors", DEFAULT_COLOR_MODE))
+
+    games = GameTable(get_games(steam_id, steam_path, config.get("cache_dir"), config.get("scan_workers", DEFAULT_SCAN_WORKERS)))
+    # Top of the list first, as the interface opens on it
+    sort_index = config.get("sort_index", 0)
+    games = games.rows(games.order(SORT_MODES[sort_index % len(SORT_MODES)], descending=config.get("ascending", False)))
+    jobs = art_jobs(games, sizes, art_cache, palette)
+    print(f"{len(games)} games, {len(jobs)} icons for {', '.join(f'{s.columns}x{s.lines}' for s in sizes)}", file=sys.stderr)
+
+    start = time.perf_counter()
+    def progress(counts):
+        done = counts["cached"] + counts["rendered"] + counts["failed"] + counts["skipped"]
+        rate = counts["rendered"] / max(time.perf_counter() - start, 1e-9)
+        print(f"\r{done}/{counts['total']} icons, {counts['rendered']} rendered ({rate:.0f}/s), "
+              f"{counts['failed']} failed", end="", file=sys.stderr, flush=True)
+
+    try:
+        counts = warm_cache(art_cache, jobs, workers, progress)
+    except KeyboardInterrupt:
+        print("\nInterrupted: run again to render the rest", file=sys.stderr)
+        return 130
+    print(f"\n{counts['rendered']} rendered, {counts['cached']} already cached, {counts['failed']} failed "
+          f"in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    if counts["skipped"]:
+        print(f"{counts['skipped']} icons left out: the cache is full, raise art_cache_mb in config.json "
+              f"(now {art_cache.max_bytes / 2 ** 20:.0f} MB)", file=sys.stderr)
+    return 0
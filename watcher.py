@@ -0,0 +1,292 @@
+"""
+watcher.py
+
+Watches the Steam files the game list is built from and reports which ones
+changed, so the UI can refresh while it is running.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+import traceback
+import ctypes
+import ctypes.util
+from parser import get_steam_libraries
+from library_snapshot import fingerprint
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Files of the Steam and user config directories that feed the game list
+WATCHED_NAMES = frozenset(["libraryfolders.vdf", "shortcuts.vdf", "localconfig.vdf", "gameprocess_log.txt"])
+
+def is_watched_name(name: str) -> bool:
+    """
+    Args:
+        name (str): File name, without directory.
+
+    Returns:
+        bool: True if changes to the file can change the game list.
+    """
+    name = name.lower()
+    return name in WATCHED_NAMES or (name.startswith("appmanifest_") and name.endswith(".acf"))
+
+def _load_inotify():
+    """
+    Returns:
+        ctypes.CDLL | None: libc exposing inotify, or None where it is not available.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class LibraryWatcher:
+    """
+    Calls on_change(paths) from a background thread when the appmanifests,
+    libraryfolders.vdf, shortcuts.vdf, localconfig.vdf or gameprocess_log.txt
+    change.
+
+    The containing directories are watched with inotify on Linux, and polled
+    for mtime/size changes elsewhere (or if inotify cannot be set up). Bursts
+    of events, such as Steam rewriting a manifest several times while
+    updating a game, are coalesced: on_change fires once the files have been
+    quiet for the debounce delay. When libraryfolders.vdf changes, the set of
+    watched libraries is resolved again. A library directory that is deleted
+    or unmounted, or that appears again, is reported as a change of
+    libraryfolders.vdf, since the library as a whole came or went.
+
+    If on_change raises, the watcher carries on and passes the exception to
+    on_error, or prints its traceback to stderr without one.
+    """
+
+    def __init__(self, steam_id: str, steam_path: str, on_change, debounce: float = DEFAULT_DEBOUNCE,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, use_inotify: bool = True, on_error=None):
+        self.steam_id = steam_id
+        self.steam_path = steam_path
+        self.on_change = on_change
+        self.on_error = on_error
+        self.libraryfolders = os.path.normpath(os.path.join(steam_path, "steamapps", "libraryfolders.vdf"))
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._libc = _load_inotify() if use_inotify else None
+        self._fd = -1
+        self._watches = {}  # inotify wd -> directory
+        self._fingerprints = {}  # polled file -> fingerprint
+        self.directories = []
+
+    @property
+    def backend(self) -> str:
+        """
+        Returns:
+            str: 'inotify' or 'poll'.
+        """
+        return "inotify" if self._fd >= 0 else "poll"
+
+    def resolve_directories(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The directories holding the watched files.
+        """
+        try:
+            libraries = get_steam_libraries(self.steam_path)
+        except Exception:
+            libraries = [self.steam_path]  # libraryfolders.vdf missing or being rewritten
+        directories = [
+            os.path.join(self.steam_path, "steamapps"),
+            os.path.join(self.steam_path, "userdata", self.steam_id, "config"),
+            os.path.join(self.steam_path, "logs"),
+        ]
+        directories += [os.path.join(lib, "steamapps") for lib in libraries]
+        unique = []
+        for directory in directories:
+            directory = os.path.normpath(directory)
+            if directory not in unique:
+                unique.append(directory)
+        return unique
+
+    def start(self):
+        """
+        Start watching on a daemon thread.
+        """
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+        self._watch(self.resolve_directories())
+        self._thread = threading.Thread(target=self._run, name="library-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the watcher thread and release the inotify descriptor.
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch(self, directories: list[str]):
+        self.directories = directories
+        if self._fd >= 0:
+            for wd, directory in list(self._watches.items()):
+                if directory not in directories:
+                    self._libc.inotify_rm_watch(self._fd, wd)
+                    del self._watches[wd]
+            watched = set(self._watches.values())
+            for directory in directories:
+                if directory in watched or not os.path.isdir(directory):
+                    continue
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+                if wd >= 0:
+                    self._watches[wd] = directory
+        else:
+            self._fingerprints = self._scan()
+
+    def _watch_returned(self) -> bool:
+        """
+        Watch the directories that were missing and exist again.
+
+        Returns:
+            bool: True if a directory is watched again.
+        """
+        watched = set(self._watches.values())
+        if all(directory in watched or not os.path.isdir(directory) for directory in self.directories):
+            return False
+        self._watch(self.directories)
+        return True
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        fingerprints = {}
+        for directory in self.directories:
+            try:
+                names = [entry.name for entry in os.scandir(directory)]
+            except OSError:
+                continue
+            for name in names:
+                if is_watched_name(name):
+                    path = os.path.join(directory, name)
+                    fp = fingerprint(path)
+                    if fp is not None:
+                        fingerprints[path] = fp
+        return fingerprints
+
+    def _read_events(self, timeout: float) -> set[str]:
+        """
+        Wait up to timeout for inotify events.
+
+        Returns:
+            set[str]: Watched files that changed.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return set()
+            raise
+
+        changed = set()
+        pos = 0
+        while pos + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: report every watched file
+                changed.update(self._scan())
+                continue
+            if mask & IN_IGNORED:
+                # The directory was deleted or unmounted: its wd is gone, and
+                # _watch_returned watches it again if it comes back
+                if self._watches.pop(wd, None) is not None:
+                    changed.add(self.libraryfolders)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            name = os.fsdecode(name)
+            if is_watched_name(name):
+                changed.add(os.path.join(directory, name))
+        return changed
+
+    def _poll(self, timeout: float) -> set[str]:
+        """
+        Wait timeout seconds, then compare the watched files with the last scan.
+
+        Returns:
+            set[str]: Watched files that were added, removed or modified.
+        """
+        if self._stop.wait(timeout):
+            return set()
+        current = self._scan()
+        previous = self._fingerprints
+        self._fingerprints = current
+        changed = {path for path, fp in current.items() if previous.get(path) != fp}
+        changed.update(path for path in previous if path not in current)
+        return changed
+
+    def _run(self):
+        pending = set()
+        last_event = 0.0
+        while not self._stop.is_set():
+            if pending:
+                timeout = max(0.0, last_event + self.debounce - time.monotonic())
+            else:
+                timeout = self.poll_interval if self._fd < 0 else 1.0
+            if self._fd >= 0:
+                changed = self._read_events(min(timeout, 1.0))
+                if not changed and not pending and self._watch_returned():
+                    # Files created before the watch was added were missed: rescan the libraries
+                    changed = {self.libraryfolders}
+            else:
+                changed = self._poll(min(timeout, self.poll_interval) if pending else timeout)
+            if changed:
+                pending |= changed
+                last_event = time.monotonic()
+                continue
+            if not pending or time.monotonic() - last_event < self.debounce:
+                continue
+
+            paths, pending = sorted(pending), set()
+            if any(os.path.basename(p).lower() == "libraryfolders.vdf" for p in paths):
+                self._watch(self.resolve_directories())
+            try:
+                self.on_change(paths)
+            except Exception as e:
+                # A failed refresh must not stop the watcher
+                if self.on_error is not None:
+                    self.on_error(e)
+                else:
+                    traceback.print_exc()